@@ -24,11 +24,11 @@ import io
 import os
 from pathlib import Path
 from fhir_parser import (
-    parse_resources, extract_patient_info,
+    parse_resources_and_timeline, extract_patient_info,
     extract_observations_df, extract_conditions_df,
     extract_medications_df, extract_encounters_df,
     extract_immunizations_df, extract_procedures_df,
-    extract_allergies_df, extract_timeline_events
+    extract_allergies_df
 )
 from generator_ui import render_generator_tab
 from dataset_ui import render_dataset_mode, render_dataset_sidebar
@@ -383,25 +383,16 @@ def render_summary_tab(resources: dict, patient_info: dict):
             st.plotly_chart(fig, use_container_width=True)
 
 
-def render_timeline_tab(resources: dict):
+def render_timeline_tab(events_df: pd.DataFrame):
     """Affiche l'onglet Chronologie"""
     st.subheader("📅 Chronologie médicale")
 
-    events_df = extract_timeline_events(resources)
-
+    # La colonne date arrive déjà parsée (datetimes naïfs, sans valeurs
+    # manquantes) du parseur FHIR: pas de re-parse ni de passe tz ici
     if events_df.empty:
         st.info("Aucun événement à afficher")
         return
 
-    # S'assurer que la colonne date est bien datetime
-    events_df['date'] = pd.to_datetime(events_df['date'], errors='coerce', utc=True)
-    events_df['date'] = events_df['date'].dt.tz_localize(None)
-    events_df = events_df.dropna(subset=['date'])
-
-    if events_df.empty:
-        st.info("Aucun événement daté à afficher")
-        return
-
     # Créer une colonne date_only pour les filtres
     events_df['date_only'] = events_df['date'].dt.date
 
@@ -985,7 +976,8 @@ def main():
         st.error("Erreur lors du chargement du dossier")
         return
 
-    resources = parse_resources(bundle)
+    # Une seule passe sur le bundle: ressources par type + timeline
+    resources, timeline_df = parse_resources_and_timeline(bundle)
     patient_resource = resources.get('Patient', [{}])[0]
     patient_info = extract_patient_info(patient_resource)
 
@@ -1007,7 +999,7 @@ def main():
         render_summary_tab(resources, patient_info)
 
     with tabs[1]:
-        render_timeline_tab(resources)
+        render_timeline_tab(timeline_df)
 
     with tabs[2]:
         render_observations_tab(resources)
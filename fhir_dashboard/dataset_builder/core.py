@@ -4,10 +4,12 @@ Core du Dataset Builder - Orchestration de la génération de datasets.
 
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Callable, Any
+from typing import Iterable, List, Dict, Optional, Callable, Any, Tuple
 import random
 
 from .patient_context import PatientContextBuilder
@@ -15,6 +17,11 @@ from .templates import get_template, AVAILABLE_TEMPLATES, UseCaseTemplate
 from .formatters import get_formatter, BaseFormatter
 from .llm_client import LLMClient, LLMResponse, estimate_dataset_cost
 
+try:
+    import orjson
+except ImportError:  # orjson optionnel, repli sur le json standard
+    orjson = None
+
 
 @dataclass
 class DatasetConfig:
@@ -30,6 +37,9 @@ class DatasetConfig:
     temperature: float = 0.7
     max_output_tokens: int = 1500
     vary_instructions: bool = True  # Générer des variations d'instructions
+    use_batch_api: bool = False  # API Batch du provider (-50% coût, async 24h)
+    max_concurrency: int = 8  # Appels LLM synchrones en parallèle (1 = séquentiel)
+    n_per_request: int = 1  # Complétions par requête HTTP (n-batching, 1 = off)
 
     def validate(self) -> List[str]:
         """Valide la configuration et retourne les erreurs."""
@@ -78,6 +88,14 @@ class DatasetStats:
     errors: List[str] = field(default_factory=list)
 
 
+# Mémo des contextes par patient_id, partagé entre les instances: l'UI
+# recrée un DatasetBuilder à chaque run, un cache d'instance ne servirait
+# donc jamais. La clé patient_id suffit car PatientContextBuilder est
+# toujours construit avec ses paramètres par défaut. Éviction FIFO.
+_CONTEXT_CACHE: Dict[str, Tuple[str, str]] = {}
+_CONTEXT_CACHE_SIZE = 256
+
+
 class DatasetBuilder:
     """
     Constructeur de datasets pour le fine-tuning LLM.
@@ -103,18 +121,48 @@ class DatasetBuilder:
         )
         self.stats = DatasetStats()
         self.examples: List[GeneratedExample] = []
+        # Protège les compteurs de stats quand les appels LLM sont parallèles
+        self._stats_lock = threading.Lock()
+
+    def _build_contexts(self, bundle: Dict, patient_id: str) -> Tuple[str, str]:
+        """
+        Retourne (contexte complet, contexte compact) pour un bundle,
+        mémoïsé par patient_id dans le cache de module (éviction FIFO
+        au-delà de 256 entrées): re-lancer une génération sur la même
+        cohorte ne repasse pas par l'extraction FHIR.
+        """
+        cached = _CONTEXT_CACHE.get(patient_id)
+        if cached is not None:
+            return cached
+
+        contexts = (
+            self.context_builder.build_full_context(bundle),
+            self.context_builder.build_compact_context(bundle)
+        )
+        if len(_CONTEXT_CACHE) >= _CONTEXT_CACHE_SIZE:
+            _CONTEXT_CACHE.pop(next(iter(_CONTEXT_CACHE)))
+        _CONTEXT_CACHE[patient_id] = contexts
+        return contexts
 
     def build_dataset(
         self,
-        patient_bundles: List[Dict],
-        progress_callback: Optional[Callable[[str, float, Optional[Dict]], None]] = None
+        patient_bundles: Iterable[Dict],
+        progress_callback: Optional[Callable[[str, float, Optional[Dict]], None]] = None,
+        stop_event: Optional[threading.Event] = None
     ) -> List[GeneratedExample]:
         """
         Construit le dataset à partir des bundles patients.
 
+        Les appels LLM (I/O-bound) sont répartis sur un pool de threads
+        borné par config.max_concurrency; avec max_concurrency=1 le
+        comportement séquentiel d'origine est conservé.
+
         Args:
-            patient_bundles: Liste de bundles FHIR patients
+            patient_bundles: Bundles FHIR patients (liste ou itérateur
+                paresseux; seuls les contextes extraits sont retenus)
             progress_callback: Callback (message, progress_0_to_1, current_example)
+            stop_event: Event d'annulation; les exemples déjà générés
+                sont retournés
 
         Returns:
             Liste d'exemples générés
@@ -123,67 +171,339 @@ class DatasetBuilder:
         self.stats = DatasetStats()
         start_time = datetime.now()
 
-        total_steps = len(patient_bundles) * self.config.examples_per_patient
+        tasks = self._prepare_tasks(patient_bundles, progress_callback, stop_event)
+        groups = self._group_tasks(tasks)
+        total_steps = len(tasks)
         current_step = 0
 
-        # Distribuer les cas d'usage équitablement
+        if self.config.max_concurrency > 1 and len(groups) > 1:
+            workers = min(self.config.max_concurrency, len(groups))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._run_task_group, group)
+                           for group in groups]
+                for future in as_completed(futures):
+                    if stop_event and stop_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                        break
+                    for task, example, error in future.result():
+                        current_step += 1
+                        self._record_result(task, example, error,
+                                            current_step, total_steps, progress_callback)
+        else:
+            for group in groups:
+                if stop_event and stop_event.is_set():
+                    break
+                for task, example, error in self._run_task_group(group):
+                    current_step += 1
+                    self._record_result(task, example, error,
+                                        current_step, total_steps, progress_callback)
+
+        self.stats.total_time = (datetime.now() - start_time).total_seconds()
+
+        if progress_callback:
+            progress_callback("Génération terminée!", 1.0, None)
+
+        return self.examples
+
+    def _prepare_tasks(
+        self,
+        patient_bundles: Iterable[Dict],
+        progress_callback: Optional[Callable[[str, float, Optional[Dict]], None]] = None,
+        stop_event: Optional[threading.Event] = None
+    ) -> List[Tuple]:
+        """
+        Construit les contextes patients et la liste plate des tâches
+        (use_case, contextes, identité patient) à générer.
+
+        Accepte tout itérable: chaque bundle est relâché dès que ses
+        contextes texte (bien plus compacts) sont extraits.
+        """
         use_cases_cycle = self._create_use_case_cycle()
+        tasks = []
+        total = len(patient_bundles) if hasattr(patient_bundles, '__len__') else None
 
         for patient_idx, bundle in enumerate(patient_bundles):
-            # Extraire les infos patient
+            if stop_event and stop_event.is_set():
+                break
+
             patient_info = self._extract_patient_info(bundle)
             patient_id = patient_info.get('id', f'patient_{patient_idx}')
             patient_name = patient_info.get('name', 'Patient inconnu')
 
-            # Construire le contexte patient
-            full_context = self.context_builder.build_full_context(bundle)
-            compact_context = self.context_builder.build_compact_context(bundle)
+            full_context, compact_context = self._build_contexts(bundle, patient_id)
 
             if progress_callback:
+                position = (f"{patient_idx + 1}/{total}" if total
+                            else f"{patient_idx + 1}")
                 progress_callback(
-                    f"Patient {patient_idx + 1}/{len(patient_bundles)}: {patient_name}",
-                    current_step / total_steps,
+                    f"Patient {position}: {patient_name}",
+                    0.0,
                     None
                 )
 
-            # Générer les exemples pour ce patient
-            for example_idx in range(self.config.examples_per_patient):
-                current_step += 1
+            for _ in range(self.config.examples_per_patient):
+                tasks.append((next(use_cases_cycle), full_context,
+                              compact_context, patient_id, patient_name))
+
+        return tasks
+
+    def _group_tasks(self, tasks: List[Tuple]) -> List[List[Tuple]]:
+        """
+        Regroupe les tâches éligibles au n-batching.
+
+        Pour les cas d'usage dont le prompt rendu ne dépend que du contexte
+        (pas de placeholder {instruction}, i.e. tout sauf medical_qa), les
+        tâches consécutives d'un même patient et cas d'usage partagent un
+        prompt identique : elles peuvent être servies par une seule requête
+        avec n complétions. Avec n_per_request=1, chaque tâche reste seule.
+        """
+        n = self.config.n_per_request
+        if n <= 1:
+            return [[task] for task in tasks]
+
+        groups: List[List[Tuple]] = []
+        by_key: Dict[Tuple, List[Tuple]] = {}
+
+        for task in tasks:
+            use_case, _full, _compact, patient_id, _name = task
+            template = get_template(use_case)
+            if '{instruction}' in template.llm_prompt_template:
+                groups.append([task])
+                continue
+            key = (patient_id, use_case)
+            bucket = by_key.setdefault(key, [])
+            bucket.append(task)
+            if len(bucket) == n:
+                groups.append(bucket)
+                by_key[key] = []
+
+        groups.extend(bucket for bucket in by_key.values() if bucket)
+        return groups
+
+    def _run_task_group(self, group: List[Tuple]
+                        ) -> List[Tuple[Tuple, Optional[GeneratedExample], Optional[str]]]:
+        """
+        Exécute un groupe n-batché en une seule requête (n complétions).
+
+        Les groupes singletons passent par le chemin standard; les groupes
+        n-batchés n'appliquent pas la variation d'instruction (elle
+        coûterait un aller-retour LLM par exemple, annulant le gain).
+        """
+        if len(group) == 1:
+            return [self._run_task(group[0])]
+
+        use_case, full_context, _compact, patient_id, patient_name = group[0]
+        template = get_template(use_case)
+        start_time = datetime.now()
+
+        try:
+            responses = self.llm_client.generate_n(
+                prompt=template.render(context=full_context),
+                system_prompt=template.system_prompt,
+                n=len(group),
+                max_tokens=self.config.max_output_tokens,
+                temperature=self.config.temperature
+            )
+        except Exception as e:
+            return [(task, None, str(e)) for task in group]
+
+        generation_time = (datetime.now() - start_time).total_seconds()
+        results = []
+
+        for task, response in zip(group, responses):
+            if not response.success:
+                results.append((task, None, response.error))
+                continue
+
+            with self._stats_lock:
+                self.stats.total_tokens_input += response.tokens_input
+                self.stats.total_tokens_output += response.tokens_output
+
+            results.append((task, GeneratedExample(
+                use_case=use_case,
+                instruction=template.get_random_instruction(),
+                input_context=full_context,
+                output=response.content,
+                patient_id=patient_id,
+                patient_name=patient_name,
+                tokens_used=response.tokens_input + response.tokens_output,
+                generation_time=generation_time / len(group),
+                metadata={
+                    'model': response.model,
+                    'template': use_case,
+                    'n_batched': len(group),
+                    'timestamp': datetime.now().isoformat()
+                }
+            ), None))
+
+        return results
+
+    def _run_task(self, task: Tuple) -> Tuple[Tuple, Optional[GeneratedExample], Optional[str]]:
+        """Exécute une tâche de génération; ne lève jamais (thread worker)."""
+        use_case, full_context, compact_context, patient_id, patient_name = task
+        try:
+            example = self._generate_example(
+                use_case=use_case,
+                full_context=full_context,
+                compact_context=compact_context,
+                patient_id=patient_id,
+                patient_name=patient_name
+            )
+            return task, example, None
+        except Exception as e:
+            return task, None, str(e)
+
+    def _record_result(
+        self,
+        task: Tuple,
+        example: Optional[GeneratedExample],
+        error: Optional[str],
+        current_step: int,
+        total_steps: int,
+        progress_callback: Optional[Callable[[str, float, Optional[Dict]], None]] = None
+    ) -> None:
+        """Comptabilise le résultat d'une tâche et notifie la progression."""
+        use_case, _full, _compact, patient_id, _name = task
+
+        with self._stats_lock:
+            self.stats.total_examples += 1
+            if example:
+                self.examples.append(example)
+                self.stats.successful_examples += 1
+                self.stats.examples_by_use_case[use_case] = \
+                    self.stats.examples_by_use_case.get(use_case, 0) + 1
+            else:
+                self.stats.failed_examples += 1
+                if error:
+                    self.stats.errors.append(f"Patient {patient_id}: {error}")
+
+        if progress_callback:
+            current_preview = None
+            if example:
+                current_preview = {
+                    'use_case': use_case,
+                    'instruction': example.instruction[:100] + '...',
+                    'output_preview': example.output[:200] + '...'
+                }
+            progress_callback(
+                f"Exemple {current_step}/{total_steps}: {use_case}",
+                current_step / total_steps,
+                current_preview
+            )
+
+    def build_dataset_batch(
+        self,
+        patient_bundles: Iterable[Dict],
+        progress_callback: Optional[Callable[[str, float, Optional[Dict]], None]] = None,
+        stop_event: Optional[threading.Event] = None
+    ) -> List[GeneratedExample]:
+        """
+        Construit le dataset via l'API Batch du provider.
+
+        Tous les prompts sont soumis en un seul job batch (~50% du coût,
+        pas de limite RPM) au lieu de N appels synchrones. Les variations
+        d'instructions sont ignorées dans ce mode (elles nécessiteraient
+        un aller-retour LLM préalable par exemple).
+
+        Args:
+            patient_bundles: Liste de bundles FHIR patients
+            progress_callback: Callback (message, progress_0_to_1, current_example)
+
+        Returns:
+            Liste d'exemples générés
+        """
+        self.examples = []
+        self.stats = DatasetStats()
+        start_time = datetime.now()
+
+        use_cases_cycle = self._create_use_case_cycle()
+
+        # 1. Préparer toutes les tâches (contextes + prompts) localement
+        total = len(patient_bundles) if hasattr(patient_bundles, '__len__') else None
+        tasks = []  # (use_case, instruction, context, patient_id, patient_name)
+        for patient_idx, bundle in enumerate(patient_bundles):
+            if stop_event and stop_event.is_set():
+                return self.examples
+            patient_info = self._extract_patient_info(bundle)
+            patient_id = patient_info.get('id', f'patient_{patient_idx}')
+            patient_name = patient_info.get('name', 'Patient inconnu')
+
+            full_context, compact_context = self._build_contexts(bundle, patient_id)
+
+            if progress_callback:
+                position = (f"{patient_idx + 1}/{total}" if total
+                            else f"{patient_idx + 1}")
+                fraction = 0.1 * (patient_idx + 1) / total if total else 0.0
+                progress_callback(
+                    f"Préparation patient {position}",
+                    fraction,
+                    None
+                )
+
+            for _ in range(self.config.examples_per_patient):
                 use_case = next(use_cases_cycle)
+                template = get_template(use_case)
+                context = compact_context if use_case == "medical_qa" else full_context
+                instruction = template.get_random_instruction()
+                tasks.append((use_case, instruction, context, patient_id, patient_name))
+
+        prompts = [
+            (get_template(uc).render(context=ctx, instruction=instr),
+             get_template(uc).system_prompt)
+            for uc, instr, ctx, _pid, _pname in tasks
+        ]
+
+        # 2. Soumettre le job batch et attendre les résultats
+        if progress_callback:
+            progress_callback(f"Soumission du batch ({len(prompts)} requêtes)...", 0.1, None)
 
-                try:
-                    example = self._generate_example(
-                        use_case=use_case,
-                        full_context=full_context,
-                        compact_context=compact_context,
-                        patient_id=patient_id,
-                        patient_name=patient_name
-                    )
-
-                    if example:
-                        self.examples.append(example)
-                        self.stats.successful_examples += 1
-                        self.stats.examples_by_use_case[use_case] = \
-                            self.stats.examples_by_use_case.get(use_case, 0) + 1
-
-                        if progress_callback:
-                            progress_callback(
-                                f"Exemple {current_step}/{total_steps}: {use_case}",
-                                current_step / total_steps,
-                                {
-                                    'use_case': use_case,
-                                    'instruction': example.instruction[:100] + '...',
-                                    'output_preview': example.output[:200] + '...'
-                                }
-                            )
-                    else:
-                        self.stats.failed_examples += 1
-
-                except Exception as e:
-                    self.stats.failed_examples += 1
-                    self.stats.errors.append(f"Patient {patient_id}: {str(e)}")
-
-                self.stats.total_examples += 1
+        def batch_progress(fraction: float):
+            if progress_callback:
+                progress_callback(
+                    f"Batch en cours: {int(fraction * len(prompts))}/{len(prompts)} requêtes",
+                    0.1 + fraction * 0.85,
+                    None
+                )
+
+        responses = self.llm_client.generate_batch(
+            prompts=prompts,
+            max_tokens=self.config.max_output_tokens,
+            temperature=self.config.temperature,
+            progress_callback=batch_progress
+        )
+
+        # 3. Réassembler les exemples
+        for (use_case, instruction, context, patient_id, patient_name), response \
+                in zip(tasks, responses):
+            self.stats.total_examples += 1
+
+            if not response.success:
+                self.stats.failed_examples += 1
+                self.stats.errors.append(f"LLM error for {patient_id}: {response.error}")
+                continue
+
+            self.stats.successful_examples += 1
+            self.stats.examples_by_use_case[use_case] = \
+                self.stats.examples_by_use_case.get(use_case, 0) + 1
+            self.stats.total_tokens_input += response.tokens_input
+            self.stats.total_tokens_output += response.tokens_output
+
+            self.examples.append(GeneratedExample(
+                use_case=use_case,
+                instruction=instruction,
+                input_context=context,
+                output=response.content,
+                patient_id=patient_id,
+                patient_name=patient_name,
+                tokens_used=response.tokens_input + response.tokens_output,
+                metadata={
+                    'model': response.model,
+                    'template': use_case,
+                    'batch': True,
+                    'timestamp': datetime.now().isoformat()
+                }
+            ))
 
         self.stats.total_time = (datetime.now() - start_time).total_seconds()
 
@@ -261,23 +581,24 @@ class DatasetBuilder:
             )
             if variation_response.success and variation_response.content:
                 instruction = variation_response.content.strip()
-                self.stats.total_tokens_input += variation_response.tokens_input
-                self.stats.total_tokens_output += variation_response.tokens_output
+                with self._stats_lock:
+                    self.stats.total_tokens_input += variation_response.tokens_input
+                    self.stats.total_tokens_output += variation_response.tokens_output
 
-        # Générer l'output
+        # Générer l'output (template pré-parsé, pas de re-parse de format-string)
         response = self.llm_client.generate_output(
-            instruction=instruction,
-            context=context,
-            template_prompt=template.llm_prompt_template,
+            prompt=template.render(context=context, instruction=instruction),
             system_prompt=template.system_prompt
         )
 
         if not response.success:
-            self.stats.errors.append(f"LLM error for {patient_id}: {response.error}")
+            with self._stats_lock:
+                self.stats.errors.append(f"LLM error for {patient_id}: {response.error}")
             return None
 
-        self.stats.total_tokens_input += response.tokens_input
-        self.stats.total_tokens_output += response.tokens_output
+        with self._stats_lock:
+            self.stats.total_tokens_input += response.tokens_input
+            self.stats.total_tokens_output += response.tokens_output
 
         generation_time = (datetime.now() - start_time).total_seconds()
 
@@ -336,13 +657,23 @@ class DatasetBuilder:
             Chemin du fichier créé
         """
         formatted = self.format_examples(examples)
-        jsonl_content = self.formatter.format_batch(formatted)
 
         path = Path(filepath)
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(jsonl_content)
+        # Écriture ligne à ligne: pas de chaîne JSONL géante en mémoire.
+        # orjson sérialise directement en bytes, nettement plus vite que
+        # le json standard sur les gros datasets.
+        if orjson is not None:
+            with open(path, 'wb') as f:
+                for example in formatted:
+                    f.write(orjson.dumps(example))
+                    f.write(b'\n')
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                for example in formatted:
+                    f.write(json.dumps(example, ensure_ascii=False))
+                    f.write('\n')
 
         return str(path)
 
@@ -362,8 +693,11 @@ class DatasetBuilder:
         path = Path(filepath)
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(formatted, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            path.write_bytes(orjson.dumps(formatted, option=orjson.OPT_INDENT_2))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(formatted, f, ensure_ascii=False, indent=2)
 
         return str(path)
 
@@ -422,7 +756,8 @@ def estimate_generation(
     examples_per_patient: int,
     use_cases: List[str],
     provider: str,
-    model: str
+    model: str,
+    use_batch_api: bool = False
 ) -> Dict:
     """
     Estime les ressources nécessaires pour une génération.
@@ -433,6 +768,7 @@ def estimate_generation(
         use_cases: Cas d'usage sélectionnés
         provider: Provider LLM
         model: Modèle LLM
+        use_batch_api: Mode batch (-50% coût, résultats sous 24h)
 
     Returns:
         Estimation avec tokens, coût, temps
@@ -451,9 +787,14 @@ def estimate_generation(
         avg_output_tokens=avg_output_tokens
     )
 
-    # Estimation du temps (environ 2-3 secondes par exemple)
+    # Estimation du temps (environ 2-3 secondes par exemple en synchrone)
     estimated_time_seconds = total_examples * 2.5
 
+    estimated_cost = cost_estimate['total_cost']
+    if use_batch_api:
+        # Tarif batch: -50%, mais résultats asynchrones (jusqu'à 24h)
+        estimated_cost *= 0.5
+
     return {
         'total_examples': total_examples,
         'use_cases': len(use_cases),
@@ -462,9 +803,12 @@ def estimate_generation(
             'output': cost_estimate['total_output_tokens'],
             'total': cost_estimate['total_input_tokens'] + cost_estimate['total_output_tokens']
         },
-        'estimated_cost_usd': cost_estimate['total_cost'],
+        'estimated_cost_usd': estimated_cost,
         'estimated_time_seconds': estimated_time_seconds,
-        'estimated_time_display': _format_duration(estimated_time_seconds)
+        'estimated_time_display': (
+            "jusqu'à 24h (batch)" if use_batch_api
+            else _format_duration(estimated_time_seconds)
+        )
     }
 
 
@@ -3,7 +3,6 @@ Formateurs de sortie pour les datasets d'entraînement LLM
 Supporte Alpaca, ShareGPT et OpenAI formats
 """
 
-import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Any
@@ -29,19 +28,6 @@ class BaseFormatter(ABC):
         """
         pass
 
-    @abstractmethod
-    def format_batch(self, examples: List[Dict]) -> str:
-        """
-        Formate une liste d'exemples en JSONL.
-
-        Args:
-            examples: Liste de dictionnaires formatés
-
-        Returns:
-            String JSONL (une ligne JSON par exemple)
-        """
-        pass
-
 
 class AlpacaFormatter(BaseFormatter):
     """
@@ -69,13 +55,6 @@ class AlpacaFormatter(BaseFormatter):
             "output": output.strip()
         }
 
-    def format_batch(self, examples: List[Dict]) -> str:
-        """Génère le JSONL Alpaca."""
-        lines = []
-        for example in examples:
-            lines.append(json.dumps(example, ensure_ascii=False))
-        return "\n".join(lines)
-
 
 class ShareGPTFormatter(BaseFormatter):
     """
@@ -125,13 +104,6 @@ class ShareGPTFormatter(BaseFormatter):
 
         return {"conversations": conversations}
 
-    def format_batch(self, examples: List[Dict]) -> str:
-        """Génère le JSONL ShareGPT."""
-        lines = []
-        for example in examples:
-            lines.append(json.dumps(example, ensure_ascii=False))
-        return "\n".join(lines)
-
 
 class OpenAIFormatter(BaseFormatter):
     """
@@ -186,13 +158,6 @@ class OpenAIFormatter(BaseFormatter):
 
         return {"messages": messages}
 
-    def format_batch(self, examples: List[Dict]) -> str:
-        """Génère le JSONL OpenAI."""
-        lines = []
-        for example in examples:
-            lines.append(json.dumps(example, ensure_ascii=False))
-        return "\n".join(lines)
-
 
 class ChatMLFormatter(BaseFormatter):
     """
@@ -236,13 +201,6 @@ class ChatMLFormatter(BaseFormatter):
 
         return {"text": text}
 
-    def format_batch(self, examples: List[Dict]) -> str:
-        """Génère le JSONL ChatML."""
-        lines = []
-        for example in examples:
-            lines.append(json.dumps(example, ensure_ascii=False))
-        return "\n".join(lines)
-
 
 # --- Factory et utilitaires ---
 
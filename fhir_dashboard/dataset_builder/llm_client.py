@@ -3,9 +3,12 @@ Client LLM pour la génération d'exemples d'entraînement.
 Supporte Mistral AI.
 """
 
+import io
+import json
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict, Any
+from typing import Callable, Optional, List, Dict, Any, Tuple
 from dataclasses import dataclass
 
 
@@ -135,6 +138,177 @@ class MistralClient(BaseLLMClient):
                 error=str(e)
             )
 
+    def generate_n(self, prompt: str, system_prompt: Optional[str] = None,
+                   n: int = 2, max_tokens: int = 1024,
+                   temperature: float = 0.7) -> List[LLMResponse]:
+        """
+        Génère n complétions indépendantes pour un même prompt en une
+        seule requête HTTP (un seul slot RPM, tokens d'entrée facturés
+        une fois).
+
+        Args:
+            prompt: Le prompt utilisateur
+            system_prompt: Prompt système optionnel
+            n: Nombre de complétions demandées
+            max_tokens: Nombre max de tokens en sortie par complétion
+            temperature: Température de génération
+
+        Returns:
+            Liste de n LLMResponse (les tokens d'entrée sont comptés sur
+            la première, les tokens de sortie répartis par choix)
+        """
+        if not self.is_available():
+            return [LLMResponse(content="", tokens_input=0, tokens_output=0,
+                                model=self.model, success=False,
+                                error="API key Mistral non configurée")
+                    for _ in range(n)]
+
+        try:
+            client = self._get_client()
+
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+
+            response = client.chat.complete(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                n=n
+            )
+
+            choices = response.choices
+            output_tokens_each = response.usage.completion_tokens // max(len(choices), 1)
+            results = []
+            for idx, choice in enumerate(choices):
+                results.append(LLMResponse(
+                    content=choice.message.content,
+                    tokens_input=response.usage.prompt_tokens if idx == 0 else 0,
+                    tokens_output=output_tokens_each,
+                    model=self.model,
+                    success=True
+                ))
+            # Si le provider renvoie moins de choix que demandé
+            while len(results) < n:
+                results.append(LLMResponse(
+                    content="", tokens_input=0, tokens_output=0,
+                    model=self.model, success=False,
+                    error="Choix manquant dans la réponse n-batch"
+                ))
+            return results
+
+        except Exception as e:
+            return [LLMResponse(content="", tokens_input=0, tokens_output=0,
+                                model=self.model, success=False, error=str(e))
+                    for _ in range(n)]
+
+    def generate_batch(self, prompts: List[Tuple[str, Optional[str]]],
+                       max_tokens: int = 1024, temperature: float = 0.7,
+                       poll_interval: float = 10.0,
+                       timeout: float = 24 * 3600,
+                       progress_callback: Optional[Callable[[float], None]] = None
+                       ) -> List[LLMResponse]:
+        """
+        Génère un lot de réponses via l'API Batch Mistral (~50% du coût,
+        résultats sous 24h, pas de limite RPM).
+
+        Args:
+            prompts: Liste de (prompt, system_prompt)
+            max_tokens: Nombre max de tokens en sortie par requête
+            temperature: Température de génération
+            poll_interval: Intervalle de polling du job (secondes)
+            timeout: Délai max d'attente du job (secondes)
+            progress_callback: Callback optionnel (progression 0-1)
+
+        Returns:
+            Liste de LLMResponse, dans l'ordre des prompts
+        """
+        def _failed(error: str) -> List[LLMResponse]:
+            return [LLMResponse(content="", tokens_input=0, tokens_output=0,
+                                model=self.model, success=False, error=error)
+                    for _ in prompts]
+
+        if not self.is_available():
+            return _failed("API key Mistral non configurée")
+
+        try:
+            client = self._get_client()
+
+            # 1. Sérialiser les requêtes en JSONL (une ligne par prompt)
+            buf = io.BytesIO()
+            for idx, (prompt, system_prompt) in enumerate(prompts):
+                messages = []
+                if system_prompt:
+                    messages.append({"role": "system", "content": system_prompt})
+                messages.append({"role": "user", "content": prompt})
+                line = {
+                    "custom_id": str(idx),
+                    "body": {
+                        "messages": messages,
+                        "max_tokens": max_tokens,
+                        "temperature": temperature,
+                    },
+                }
+                buf.write(json.dumps(line, ensure_ascii=False).encode('utf-8'))
+                buf.write(b"\n")
+
+            # 2. Soumettre le fichier et créer le job batch
+            batch_file = client.files.upload(
+                file={"file_name": "dataset_batch.jsonl", "content": buf.getvalue()},
+                purpose="batch"
+            )
+            job = client.batch.jobs.create(
+                input_files=[batch_file.id],
+                model=self.model,
+                endpoint="/v1/chat/completions"
+            )
+
+            # 3. Attendre la fin du job
+            deadline = time.monotonic() + timeout
+            while job.status in ("QUEUED", "RUNNING"):
+                if time.monotonic() > deadline:
+                    return _failed(f"Batch {job.id}: timeout après {timeout}s")
+                if progress_callback:
+                    done = getattr(job, 'completed_requests', 0) or 0
+                    progress_callback(done / max(len(prompts), 1))
+                time.sleep(poll_interval)
+                job = client.batch.jobs.get(job_id=job.id)
+
+            if job.status != "SUCCESS" or not job.output_file:
+                return _failed(f"Batch {job.id}: statut {job.status}")
+
+            # 4. Télécharger et réassocier les résultats par custom_id
+            output = client.files.download(file_id=job.output_file)
+            raw = output.read() if hasattr(output, 'read') else output
+
+            results: Dict[int, LLMResponse] = {}
+            for line in raw.decode('utf-8').splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                idx = int(entry['custom_id'])
+                body = entry.get('response', {}).get('body', {})
+                choices = body.get('choices', [])
+                usage = body.get('usage', {})
+                if choices:
+                    results[idx] = LLMResponse(
+                        content=choices[0].get('message', {}).get('content', ''),
+                        tokens_input=usage.get('prompt_tokens', 0),
+                        tokens_output=usage.get('completion_tokens', 0),
+                        model=self.model,
+                        success=True
+                    )
+
+            missing = LLMResponse(content="", tokens_input=0, tokens_output=0,
+                                  model=self.model, success=False,
+                                  error="Pas de réponse dans le batch")
+            return [results.get(idx, missing) for idx in range(len(prompts))]
+
+        except Exception as e:
+            return _failed(str(e))
+
 
 class LLMClient:
     """
@@ -204,6 +378,53 @@ class LLMClient:
             temperature=temperature
         )
 
+    def generate_n(self, prompt: str, system_prompt: Optional[str] = None,
+                   n: int = 2, max_tokens: int = 1024,
+                   temperature: float = 0.7) -> List[LLMResponse]:
+        """
+        Génère n complétions pour un même prompt en une seule requête.
+
+        Args:
+            prompt: Le prompt utilisateur
+            system_prompt: Prompt système optionnel
+            n: Nombre de complétions demandées
+            max_tokens: Nombre max de tokens en sortie par complétion
+            temperature: Température de génération
+
+        Returns:
+            Liste de n LLMResponse
+        """
+        return self._client.generate_n(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            n=n,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+    def generate_batch(self, prompts: List[Tuple[str, Optional[str]]],
+                       max_tokens: int = 1024, temperature: float = 0.7,
+                       progress_callback: Optional[Callable[[float], None]] = None
+                       ) -> List[LLMResponse]:
+        """
+        Génère un lot de réponses via l'API Batch du provider.
+
+        Args:
+            prompts: Liste de (prompt, system_prompt)
+            max_tokens: Nombre max de tokens en sortie par requête
+            temperature: Température de génération
+            progress_callback: Callback optionnel (progression 0-1)
+
+        Returns:
+            Liste de LLMResponse, dans l'ordre des prompts
+        """
+        return self._client.generate_batch(
+            prompts=prompts,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            progress_callback=progress_callback
+        )
+
     def generate_instruction_variation(self, base_instruction: str,
                                         context_hint: str = "") -> LLMResponse:
         """
@@ -231,26 +452,17 @@ Réponds UNIQUEMENT avec l'instruction reformulée, sans explication."""
             temperature=0.8
         )
 
-    def generate_output(self, instruction: str, context: str,
-                        template_prompt: str, system_prompt: str) -> LLMResponse:
+    def generate_output(self, prompt: str, system_prompt: str) -> LLMResponse:
         """
         Génère la réponse/output pour un exemple d'entraînement.
 
         Args:
-            instruction: L'instruction/question
-            context: Le contexte patient
-            template_prompt: Le template de prompt pour la génération
+            prompt: Le prompt déjà rendu (via UseCaseTemplate.render)
             system_prompt: Le prompt système
 
         Returns:
             LLMResponse avec l'output généré
         """
-        # Remplacer les placeholders dans le template
-        prompt = template_prompt.format(
-            instruction=instruction,
-            context=context
-        )
-
         return self.generate(
             prompt=prompt,
             system_prompt=system_prompt,
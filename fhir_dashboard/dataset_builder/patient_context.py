@@ -3,10 +3,34 @@ Construction du contexte patient à partir des données FHIR pour le fine-tuning
 """
 
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from io import StringIO
+from typing import Dict, Iterator, List, Optional, Any
 from collections import defaultdict
 
 
+# Types de ressources consommés par le builder (un seul passage sur le bundle)
+_CONTEXT_RESOURCE_TYPES = (
+    'Patient',
+    'Condition',
+    'Observation',
+    'MedicationRequest',
+    'AllergyIntolerance',
+    'Procedure',
+    'Encounter',
+    'Immunization',
+)
+
+# Catégories d'observations connues (labels français)
+_CATEGORY_LABELS = {
+    'vital-signs': 'Signes Vitaux',
+    'laboratory': 'Résultats de Laboratoire',
+    'social-history': 'Histoire Sociale',
+    'survey': 'Questionnaires',
+    'imaging': 'Imagerie',
+    'autres': 'Autres Observations'
+}
+
+
 class PatientContextBuilder:
     """
     Construit un contexte textuel structuré à partir d'un bundle FHIR patient.
@@ -34,49 +58,60 @@ class PatientContextBuilder:
         """
         resources = self._parse_resources(bundle)
 
-        sections = []
-
+        # Sections écrites au fil de l'eau dans un StringIO : le pic mémoire
+        # est la plus grosse section, pas la somme de toutes les sections
+        out = StringIO()
+        first = True
+        for section in self._iter_sections(resources):
+            if section:
+                if not first:
+                    out.write("\n\n")
+                out.write(section)
+                first = False
+        return out.getvalue()
+
+    def _iter_sections(self, resources: Dict[str, List[Dict]]) -> Iterator[str]:
+        """Génère les sections du contexte une par une (lazy)."""
         # Démographie
-        patient = resources.get('Patient', [None])[0]
+        patients = resources.get('Patient', [])
+        patient = patients[0] if patients else None
         if patient:
-            sections.append(self.build_demographics(patient))
+            yield self.build_demographics(patient)
 
         # Antécédents médicaux (conditions)
         conditions = resources.get('Condition', [])
         if conditions:
-            sections.append(self.build_conditions_summary(conditions))
+            yield self.build_conditions_summary(conditions)
 
         # Observations récentes
         observations = resources.get('Observation', [])
         if observations:
-            sections.append(self.build_observations_summary(observations))
+            yield self.build_observations_summary(observations)
 
         # Traitements en cours
         medications = resources.get('MedicationRequest', [])
         if medications:
-            sections.append(self.build_medications_summary(medications))
+            yield self.build_medications_summary(medications)
 
         # Allergies
         allergies = resources.get('AllergyIntolerance', [])
         if allergies:
-            sections.append(self.build_allergies_summary(allergies))
+            yield self.build_allergies_summary(allergies)
 
         # Procédures/Actes récents
         procedures = resources.get('Procedure', [])
         if procedures:
-            sections.append(self.build_procedures_summary(procedures))
+            yield self.build_procedures_summary(procedures)
 
         # Consultations récentes
         encounters = resources.get('Encounter', [])
         if encounters:
-            sections.append(self.build_encounters_summary(encounters))
+            yield self.build_encounters_summary(encounters)
 
         # Vaccinations
         immunizations = resources.get('Immunization', [])
         if immunizations:
-            sections.append(self.build_immunizations_summary(immunizations))
-
-        return "\n\n".join(filter(None, sections))
+            yield self.build_immunizations_summary(immunizations)
 
     def build_demographics(self, patient: Dict) -> str:
         """Construit la section démographique."""
@@ -192,8 +227,8 @@ class PatientContextBuilder:
         """Construit le résumé des observations/résultats."""
         lines = ["## Observations Cliniques"]
 
-        # Grouper par catégorie
-        by_category = defaultdict(list)
+        # Grouper par catégorie (buckets préalloués, catégorie inconnue → 'autres')
+        buckets = {k: [] for k in _CATEGORY_LABELS}
 
         for obs in observations:
             # Catégorie
@@ -203,6 +238,8 @@ class PatientContextBuilder:
                 cat_codings = categories[0].get('coding', [])
                 if cat_codings:
                     category = cat_codings[0].get('code', 'autres')
+            if category not in buckets:
+                category = 'autres'
 
             # Code et display
             code_data = obs.get('code', {})
@@ -215,23 +252,15 @@ class PatientContextBuilder:
             value_str = self._extract_observation_value(obs)
             date = self._format_date(obs.get('effectiveDateTime') or obs.get('issued'))
 
-            by_category[category].append((display, value_str, date))
+            buckets[category].append((display, value_str, date))
 
-        # Catégories en français
-        category_labels = {
-            'vital-signs': 'Signes Vitaux',
-            'laboratory': 'Résultats de Laboratoire',
-            'social-history': 'Histoire Sociale',
-            'survey': 'Questionnaires',
-            'imaging': 'Imagerie',
-            'autres': 'Autres Observations'
-        }
+        non_empty = {cat: obs_list for cat, obs_list in buckets.items() if obs_list}
+        max_per_category = max(1, self.max_observations // len(non_empty)) if non_empty else 0
 
-        for cat, obs_list in by_category.items():
-            cat_label = category_labels.get(cat, cat.replace('-', ' ').title())
-            lines.append(f"\n### {cat_label}")
+        for cat, obs_list in non_empty.items():
+            lines.append(f"\n### {_CATEGORY_LABELS[cat]}")
 
-            for display, value, date in obs_list[:self.max_observations // len(by_category)]:
+            for display, value, date in obs_list[:max_per_category]:
                 if value and date:
                     lines.append(f"- {display}: {value} ({date})")
                 elif value:
@@ -397,7 +426,8 @@ class PatientContextBuilder:
         lines = []
 
         # Patient en une ligne
-        patient = resources.get('Patient', [None])[0]
+        patients = resources.get('Patient', [])
+        patient = patients[0] if patients else None
         if patient:
             names = patient.get('name', [])
             name = ''
@@ -455,17 +485,46 @@ class PatientContextBuilder:
 
         return "\n".join(lines)
 
+    def build_compact_contexts(self, bundles: List[Dict],
+                               workers: Optional[int] = None) -> List[str]:
+        """
+        Construit les contextes compacts d'un lot de patients en parallèle.
+
+        build_compact_context est pur (aucun état partagé après __init__),
+        donc le lot est réparti sur un pool de processus. En dessous de
+        quelques centaines de bundles, le coût de sérialisation dépasse le
+        gain : on reste alors en séquentiel.
+
+        Args:
+            bundles: Liste de bundles FHIR patients
+            workers: Nombre de processus (défaut: os.cpu_count())
+
+        Returns:
+            Liste des contextes compacts, dans l'ordre des bundles
+        """
+        if len(bundles) < 256:
+            return [self.build_compact_context(b) for b in bundles]
+
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.build_compact_context, bundles, chunksize=64))
+
     # --- Méthodes utilitaires ---
 
     def _parse_resources(self, bundle: Dict) -> Dict[str, List[Dict]]:
-        """Parse le bundle en dictionnaire par type de ressource."""
-        resources = defaultdict(list)
+        """
+        Parse le bundle en dictionnaire par type de ressource.
+
+        Buckets préalloués pour les seuls types consommés par le builder :
+        un passage sur les entrées, pas de defaultdict ni de types inutiles.
+        """
+        resources = {rt: [] for rt in _CONTEXT_RESOURCE_TYPES}
         for entry in bundle.get('entry', []):
             resource = entry.get('resource', {})
-            resource_type = resource.get('resourceType')
-            if resource_type:
-                resources[resource_type].append(resource)
-        return dict(resources)
+            bucket = resources.get(resource.get('resourceType'))
+            if bucket is not None:
+                bucket.append(resource)
+        return resources
 
     def _get_first_display(self, code_data: Dict) -> Optional[str]:
         """Extrait le premier display d'un CodeableConcept."""
@@ -478,6 +537,10 @@ class PatientContextBuilder:
         """Formate une date ISO en format français."""
         if not date_str:
             return ""
+        # Cas courant : préfixe YYYY-MM-DD déjà bien formé (avec ou sans heure),
+        # réarrangé par simples slices sans round-trip datetime
+        if len(date_str) >= 10 and date_str[4] == '-' and date_str[7] == '-':
+            return date_str[8:10] + '/' + date_str[5:7] + '/' + date_str[:4]
         try:
             if 'T' in date_str:
                 dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
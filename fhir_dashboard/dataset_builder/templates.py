@@ -6,18 +6,22 @@ Chaque template définit les instructions de base et le format de sortie attendu
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 import random
+import string
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UseCaseTemplate:
     """
     Template pour un cas d'usage de génération d'exemples.
 
+    Immuable et slotté : les instances vivent toute la durée du process
+    et leurs attributs sont lus à chaque exemple généré.
+
     Attributes:
         use_case: Identifiant du cas d'usage
         name_fr: Nom en français
         description: Description du cas d'usage
-        base_instructions: Liste d'instructions de base (variations)
+        base_instructions: Instructions de base (variations)
         system_prompt: Prompt système pour le contexte LLM
         output_format: Description du format de sortie attendu
         llm_prompt_template: Template pour la génération LLM de l'output
@@ -29,11 +33,40 @@ class UseCaseTemplate:
     system_prompt: str
     output_format: str
     llm_prompt_template: str
+    _render_tokens: List = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Instructions figées en tuple (random.choice sans garde de mutation)
+        object.__setattr__(self, 'base_instructions',
+                           tuple(self.base_instructions))
+        # Pré-parser le template une seule fois : liste de (littéral, placeholder)
+        # pour éviter de re-parser la format-string à chaque patient.
+        object.__setattr__(self, '_render_tokens', [
+            (literal, field_name)
+            for literal, field_name, _spec, _conv
+            in string.Formatter().parse(self.llm_prompt_template)
+        ])
 
     def get_random_instruction(self) -> str:
         """Retourne une instruction aléatoire parmi les variations."""
         return random.choice(self.base_instructions)
 
+    def render(self, context: str, instruction: str = '') -> str:
+        """
+        Rend le prompt LLM en substituant {context} et {instruction}.
+
+        Équivalent à llm_prompt_template.format(...) mais sans re-parser
+        le template à chaque appel (un seul join C-level).
+        """
+        values = {'context': context, 'instruction': instruction}
+        parts = []
+        for literal, field_name in self._render_tokens:
+            if literal:
+                parts.append(literal)
+            if field_name is not None:
+                parts.append(values.get(field_name, ''))
+        return ''.join(parts)
+
 
 # --- Templates par cas d'usage ---
 
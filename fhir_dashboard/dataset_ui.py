@@ -3,12 +3,23 @@ Interface utilisateur Streamlit pour le constructeur de datasets LLM
 """
 
 import streamlit as st
+import pandas as pd
 from typing import Dict, List, Optional
+import queue
+import tempfile
+import threading
 import time
 import json
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
 from dataset_builder import (
     DatasetConfig,
     DatasetBuilder,
@@ -31,6 +42,56 @@ from dataset_builder.core import estimate_generation
 from data_loader import load_patient_index, load_patient_bundle
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_estimate(num_patients: int, examples_per_patient: int,
+                     use_cases: tuple, provider: str, model: str,
+                     use_batch_api: bool) -> Dict:
+    """Mémoïse estimate_generation (pure) sur sa clé de paramètres."""
+    return estimate_generation(
+        num_patients=num_patients,
+        examples_per_patient=examples_per_patient,
+        use_cases=list(use_cases),
+        provider=provider,
+        model=model,
+        use_batch_api=use_batch_api
+    )
+
+
+# Registres statiques pour la durée du process : calculés une fois à
+# l'import plutôt que reconstruits (ou re-hashés par st.cache_data)
+# à chaque rerun.
+_PROVIDERS: Dict[str, str] = LLMClient.get_available_providers()
+_PROVIDER_IDS: List[str] = list(_PROVIDERS.keys())
+_MODELS_BY_PROVIDER: Dict[str, List[str]] = {
+    p: LLMClient.get_models_for_provider(p) for p in _PROVIDERS
+}
+_FORMATS: Dict[str, Dict[str, str]] = get_available_formats()
+_FORMAT_OPTIONS: Dict[str, str] = {v['label']: k for k, v in _FORMATS.items()}
+_FORMAT_LABELS: List[str] = list(_FORMAT_OPTIONS.keys())
+_FORMAT_IDS: List[str] = list(_FORMAT_OPTIONS.values())
+
+
+@st.cache_resource
+def _dataset_store() -> Dict:
+    """
+    Stockage singleton des datasets générés, indexé par run_id.
+
+    Contrairement à session_state, st.cache_resource n'est jamais re-hashé
+    par Streamlit à chaque rerun : les 10k+ exemples d'une génération n'y
+    coûtent rien lors de la navigation dans les résultats. La session ne
+    garde que le run_id et les stats (petits et hashables).
+    """
+    return {}
+
+
+# Buffer d'aperçu réutilisé en place (pas de dict alloué par exemple)
+_PREVIEW_BUFFER: Dict[str, str] = {
+    'use_case': '',
+    'instruction': '',
+    'output_preview': '',
+}
+
+
 def render_dataset_mode():
     """Point d'entrée principal pour le mode Dataset Builder"""
     st.header("📊 Constructeur de Dataset LLM")
@@ -87,10 +148,14 @@ def _init_session_state():
         'dataset_model': 'jpacifico/Chocolatine-2-14B-Instruct-v2.0.3',
         'dataset_api_key': '',
         'dataset_vary_instructions': True,
+        'dataset_use_batch_api': False,
+        'dataset_max_concurrency': 8,
+        'dataset_n_per_request': 1,
         'dataset_result': None,
-        'dataset_examples': [],
+        'dataset_run_id': None,
         'dataset_stats': None,
         'dataset_is_generating': False,
+        'dataset_job': None,
         'dataset_progress': 0.0,
         'dataset_progress_message': '',
     }
@@ -105,23 +170,25 @@ def render_use_case_selector():
 
     use_cases_info = get_use_case_info()
 
-    # Checkboxes pour chaque cas d'usage
-    selected = []
-
-    cols = st.columns(2)
-    for idx, uc_info in enumerate(use_cases_info):
-        with cols[idx % 2]:
-            checked = st.checkbox(
-                uc_info['label'],
-                value=uc_info['id'] in st.session_state.dataset_use_cases,
-                key=f"uc_{uc_info['id']}",
-                help=uc_info['description']
-            )
-            if checked:
-                selected.append(uc_info['id'])
+    # Un seul widget multi-valeurs plutôt que N checkboxes : une seule
+    # mutation d'état (et un seul rerun) par changement de sélection.
+    selected = st.multiselect(
+        "Cas d'usage",
+        options=[uc_info['id'] for uc_info in use_cases_info],
+        default=[
+            uc for uc in st.session_state.dataset_use_cases
+            if uc in USE_CASE_LABELS
+        ],
+        format_func=lambda uc: USE_CASE_LABELS.get(uc, uc),
+        help="Types d'exemples à générer pour le dataset"
+    )
 
     st.session_state.dataset_use_cases = selected
 
+    with st.expander("ℹ️ Descriptions des cas d'usage"):
+        for uc_info in use_cases_info:
+            st.caption(f"**{uc_info['label']}** — {uc_info['description']}")
+
     if not selected:
         st.warning("⚠️ Sélectionnez au moins un cas d'usage")
 
@@ -130,22 +197,19 @@ def render_format_selector():
     """Sélecteur de format de sortie"""
     st.subheader("📋 Format de sortie")
 
-    formats = get_available_formats()
-    format_options = {v['label']: k for k, v in formats.items()}
-
     selected_label = st.selectbox(
         "Format du dataset",
-        options=list(format_options.keys()),
-        index=list(format_options.values()).index(st.session_state.dataset_format)
-        if st.session_state.dataset_format in format_options.values() else 0,
+        options=_FORMAT_LABELS,
+        index=_FORMAT_IDS.index(st.session_state.dataset_format)
+        if st.session_state.dataset_format in _FORMAT_OPTIONS.values() else 0,
         help="Choisissez le format adapté à votre framework de fine-tuning"
     )
 
-    st.session_state.dataset_format = format_options[selected_label]
+    st.session_state.dataset_format = _FORMAT_OPTIONS[selected_label]
 
     # Description du format
     format_id = st.session_state.dataset_format
-    st.caption(f"ℹ️ {formats[format_id]['description']}")
+    st.caption(f"ℹ️ {_FORMATS[format_id]['description']}")
 
 
 def render_patient_selector(patient_index):
@@ -183,18 +247,17 @@ def render_llm_config():
     st.subheader("🤖 Configuration LLM")
 
     # Provider
-    providers = LLMClient.get_available_providers()
     provider = st.selectbox(
         "Provider",
-        options=list(providers.keys()),
-        format_func=lambda x: providers[x],
-        index=list(providers.keys()).index(st.session_state.dataset_provider)
-        if st.session_state.dataset_provider in providers else 0
+        options=_PROVIDER_IDS,
+        format_func=lambda x: _PROVIDERS[x],
+        index=_PROVIDER_IDS.index(st.session_state.dataset_provider)
+        if st.session_state.dataset_provider in _PROVIDERS else 0
     )
     st.session_state.dataset_provider = provider
 
     # Modèle
-    models = LLMClient.get_models_for_provider(provider)
+    models = _MODELS_BY_PROVIDER[provider]
     current_model = st.session_state.dataset_model
     if current_model not in models:
         current_model = models[0] if models else ""
@@ -211,7 +274,7 @@ def render_llm_config():
         "Clé API",
         value=st.session_state.dataset_api_key,
         type="password",
-        help=f"Clé API {providers[provider]}"
+        help=f"Clé API {_PROVIDERS[provider]}"
     )
     st.session_state.dataset_api_key = api_key
 
@@ -226,7 +289,39 @@ def render_llm_config():
     )
     st.session_state.dataset_vary_instructions = vary
 
+    # Parallélisme des appels synchrones
+    max_concurrency = st.slider(
+        "Requêtes parallèles",
+        min_value=1,
+        max_value=32,
+        value=st.session_state.dataset_max_concurrency,
+        help="Nombre d'appels LLM simultanés (1 = séquentiel). "
+             "À ajuster selon les limites de débit du provider"
+    )
+    st.session_state.dataset_max_concurrency = max_concurrency
+
+    # n-batching (plusieurs complétions par requête HTTP)
+    n_per_request = st.slider(
+        "Complétions par requête",
+        min_value=1,
+        max_value=8,
+        value=st.session_state.dataset_n_per_request,
+        help="Regroupe n exemples d'un même patient dans une seule requête "
+             "(utile si le provider limite les requêtes par minute)"
+    )
+    st.session_state.dataset_n_per_request = n_per_request
+
+    # Option API Batch
+    use_batch = st.checkbox(
+        "Mode batch API (−50% coût, jusqu'à 24h)",
+        value=st.session_state.dataset_use_batch_api,
+        help="Soumet toutes les requêtes en un seul job batch asynchrone: "
+             "moitié prix et sans limite de débit, mais résultats différés"
+    )
+    st.session_state.dataset_use_batch_api = use_batch
 
+
+@st.fragment
 def render_estimation():
     """Estimation des ressources"""
     st.subheader("📊 Estimation")
@@ -235,14 +330,32 @@ def render_estimation():
         st.caption("Sélectionnez des cas d'usage pour voir l'estimation")
         return
 
-    estimation = estimate_generation(
-        num_patients=st.session_state.dataset_num_patients,
-        examples_per_patient=st.session_state.dataset_examples_per_patient,
-        use_cases=st.session_state.dataset_use_cases,
-        provider=st.session_state.dataset_provider,
-        model=st.session_state.dataset_model
+    # Court-circuit : si aucun paramètre n'a changé depuis le dernier rerun
+    # (ex: saisie dans le champ API key), on réaffiche la dernière estimation
+    # sans repasser par le cache (Streamlit dédupliquera le frame identique).
+    est_key = (
+        st.session_state.dataset_num_patients,
+        st.session_state.dataset_examples_per_patient,
+        tuple(sorted(st.session_state.dataset_use_cases)),
+        st.session_state.dataset_provider,
+        st.session_state.dataset_model,
+        st.session_state.dataset_use_batch_api,
     )
 
+    if est_key == st.session_state.get('_last_est_key'):
+        estimation = st.session_state['_last_est_value']
+    else:
+        estimation = _cached_estimate(
+            num_patients=est_key[0],
+            examples_per_patient=est_key[1],
+            use_cases=est_key[2],
+            provider=est_key[3],
+            model=est_key[4],
+            use_batch_api=est_key[5]
+        )
+        st.session_state['_last_est_key'] = est_key
+        st.session_state['_last_est_value'] = estimation
+
     col1, col2 = st.columns(2)
 
     with col1:
@@ -275,18 +388,13 @@ def render_generate_button():
         ):
             run_generation()
 
-    # Barre de progression
+    # Suivi du job de génération en arrière-plan
     if st.session_state.dataset_is_generating:
-        st.progress(st.session_state.dataset_progress)
-        st.caption(st.session_state.dataset_progress_message)
+        _poll_generation()
 
 
 def run_generation():
-    """Exécute la génération du dataset"""
-    st.session_state.dataset_is_generating = True
-    st.session_state.dataset_result = None
-    st.session_state.dataset_examples = []
-
+    """Valide la configuration et lance la génération en arrière-plan"""
     # Créer la configuration
     config = DatasetConfig(
         use_cases=st.session_state.dataset_use_cases,
@@ -295,7 +403,10 @@ def run_generation():
         llm_provider=st.session_state.dataset_provider,
         llm_model=st.session_state.dataset_model,
         api_key=st.session_state.dataset_api_key,
-        vary_instructions=st.session_state.dataset_vary_instructions
+        vary_instructions=st.session_state.dataset_vary_instructions,
+        use_batch_api=st.session_state.dataset_use_batch_api,
+        max_concurrency=st.session_state.dataset_max_concurrency,
+        n_per_request=st.session_state.dataset_n_per_request
     )
 
     # Valider
@@ -304,85 +415,194 @@ def run_generation():
         st.error("Erreurs de configuration:")
         for err in errors:
             st.warning(f"• {err}")
-        st.session_state.dataset_is_generating = False
         return
 
     # Charger les patients
     patient_index = load_patient_index()
     selected_patients = patient_index.head(st.session_state.dataset_num_patients)
 
-    # Charger les bundles
-    patient_bundles = []
-    progress_bar = st.progress(0.0)
-    status_text = st.empty()
-
-    status_text.text("Chargement des patients...")
-    for idx, (_, patient) in enumerate(selected_patients.iterrows()):
-        bundle = load_patient_bundle(patient['file'])
-        if bundle:
-            patient_bundles.append(bundle)
-        progress_bar.progress((idx + 1) / len(selected_patients) * 0.1)
-
-    if not patient_bundles:
+    if selected_patients.empty:
         st.error("Aucun patient n'a pu être chargé")
-        st.session_state.dataset_is_generating = False
         return
 
-    # Créer le builder et générer
+    # Chargement paresseux: chaque bundle n'est parsé qu'au moment où le
+    # builder le consomme, au lieu de précharger toute la cohorte en RAM.
+    # Accès colonne direct: pas de Series boxée par ligne comme avec iterrows
+    patient_files = selected_patients['file'].tolist()
+
     builder = DatasetBuilder(config)
+    progress_queue: queue.Queue = queue.Queue()
+    stop_event = threading.Event()
+    script_ctx = get_script_run_ctx()
+
+    def bundle_iter():
+        # Lectures disque parallélisées avec une fenêtre de préchargement
+        # bornée (pas de cohorte entière en RAM): pendant que le builder
+        # consomme un bundle, les 8 suivants se chargent en arrière-plan.
+        # L'initializer propage le contexte de script aux threads du pool
+        # pour que load_patient_bundle (st.cache_data) y reste utilisable.
+        with ThreadPoolExecutor(
+            max_workers=8,
+            initializer=lambda: add_script_run_ctx(ctx=script_ctx)
+        ) as executor:
+            files = iter(patient_files)
+            pending = deque(
+                executor.submit(load_patient_bundle, filename)
+                for filename in islice(files, 8)
+            )
+            while pending:
+                bundle = pending.popleft().result()
+                for filename in islice(files, 1):
+                    pending.append(executor.submit(load_patient_bundle, filename))
+                if bundle:
+                    yield bundle
+
+    def queue_progress(message: str, progress: float, current_example: Optional[Dict]):
+        progress_queue.put(('progress', (message, progress, current_example)))
+
+    def worker():
+        try:
+            build = (builder.build_dataset_batch if config.use_batch_api
+                     else builder.build_dataset)
+            examples = build(
+                patient_bundles=bundle_iter(),
+                progress_callback=queue_progress,
+                stop_event=stop_event
+            )
+            progress_queue.put(('done', examples))
+        except Exception as e:
+            progress_queue.put(('error', str(e)))
 
-    # Placeholder pour les mises à jour
-    progress_placeholder = st.empty()
-    preview_placeholder = st.empty()
-
-    def progress_callback(message: str, progress: float, current_example: Optional[Dict]):
-        st.session_state.dataset_progress = progress
-        st.session_state.dataset_progress_message = message
-
-        progress_bar.progress(0.1 + progress * 0.9)
-        status_text.text(message)
-
-        if current_example:
-            with preview_placeholder.container():
-                st.caption("Dernier exemple généré:")
-                st.json({
-                    'use_case': current_example.get('use_case', ''),
-                    'instruction': current_example.get('instruction', '')[:100] + '...',
-                    'output_preview': current_example.get('output_preview', '')
-                })
-
-    try:
-        examples = builder.build_dataset(
-            patient_bundles=patient_bundles,
-            progress_callback=progress_callback
+    thread = threading.Thread(target=worker, daemon=True)
+    # Attache le contexte de script pour que le worker puisse appeler
+    # les loaders décorés st.cache_data
+    add_script_run_ctx(thread)
+    thread.start()
+
+    st.session_state.dataset_is_generating = True
+    st.session_state.dataset_result = None
+    st.session_state.dataset_run_id = None
+    st.session_state.dataset_progress = 0.0
+    st.session_state.dataset_progress_message = "Démarrage..."
+    st.session_state.dataset_job = {
+        'queue': progress_queue,
+        'stop': stop_event,
+        'thread': thread,
+        'builder': builder,
+    }
+    # Pas de st.rerun() ici: _poll_generation() est atteint plus bas dans
+    # le même script run (render_generate_button teste dataset_is_generating
+    # après le bloc bouton), l'UI de suivi s'affiche donc sans cycle
+    # supplémentaire.
+
+
+def _poll_generation():
+    """
+    Affiche la progression du job en arrière-plan.
+
+    Draine la file de messages du worker sans bloquer puis replanifie un
+    rerun: l'UI reste réactive pendant toute la génération et le bouton
+    Annuler est pris en compte entre deux exemples.
+    """
+    job = st.session_state.dataset_job
+    if not job:
+        st.session_state.dataset_is_generating = False
+        return
+
+    if st.button("⏹ Annuler"):
+        job['stop'].set()
+        st.caption("Annulation demandée: arrêt après les exemples en cours...")
+
+    # Drainer la file sans bloquer: seul le dernier état compte
+    done_examples = None
+    error_message = None
+    last_preview = None
+    while True:
+        try:
+            kind, payload = job['queue'].get_nowait()
+        except queue.Empty:
+            break
+        if kind == 'progress':
+            message, progress, current_example = payload
+            st.session_state.dataset_progress = progress
+            st.session_state.dataset_progress_message = message
+            if current_example:
+                last_preview = current_example
+        elif kind == 'done':
+            done_examples = payload
+        else:
+            error_message = payload
+
+    st.progress(st.session_state.dataset_progress)
+    st.caption(st.session_state.dataset_progress_message)
+
+    if last_preview:
+        _PREVIEW_BUFFER['use_case'] = last_preview.get('use_case', '')
+        _PREVIEW_BUFFER['instruction'] = last_preview.get('instruction', '')[:100]
+        _PREVIEW_BUFFER['output_preview'] = last_preview.get('output_preview', '')
+        st.caption("Dernier exemple généré:")
+        # st.code est bien moins coûteux à re-rendre que st.json
+        st.code(
+            json.dumps(_PREVIEW_BUFFER, ensure_ascii=False)[:400],
+            language='json'
         )
 
-        st.session_state.dataset_examples = examples
-        st.session_state.dataset_stats = builder.get_statistics()
-        st.session_state.dataset_result = {
-            'success': True,
-            'examples': examples,
-            'stats': builder.get_statistics(),
-            'formatted': builder.format_examples()
-        }
-
-    except Exception as e:
-        st.session_state.dataset_result = {
-            'success': False,
-            'error': str(e)
-        }
-        st.error(f"Erreur lors de la génération: {e}")
-
-    finally:
+    if error_message is not None:
+        st.session_state.dataset_result = {'success': False, 'error': error_message}
+        st.session_state.dataset_job = None
+        st.session_state.dataset_is_generating = False
+        st.error(f"Erreur lors de la génération: {error_message}")
+        st.rerun()
+    elif done_examples is not None:
+        _finalize_generation(job['builder'], done_examples)
+        st.session_state.dataset_job = None
         st.session_state.dataset_is_generating = False
-        progress_bar.empty()
-        status_text.empty()
-        preview_placeholder.empty()
         st.rerun()
+    else:
+        # Re-poll dans 500 ms; le worker continue pendant ce temps
+        time.sleep(0.5)
+        st.rerun()
+
 
+def _finalize_generation(builder: DatasetBuilder, examples: List[GeneratedExample]):
+    """
+    Écrit le dataset formaté sur disque et ne garde en mémoire que le
+    chemin, le nombre d'exemples et les stats (pas de copie des exemples
+    épinglée dans la session pour toute sa durée de vie).
+    """
+    run_id = uuid.uuid4().hex
+    export_dir = Path(tempfile.gettempdir()) / 'synthea_datasets'
+    export_dir.mkdir(parents=True, exist_ok=True)
+    dataset_path = builder.export_jsonl(str(export_dir / f"{run_id}.jsonl"), examples)
+
+    store = _dataset_store()
+    # Une seule génération conservée à la fois (fichiers inclus)
+    for old in store.values():
+        Path(old['path']).unlink(missing_ok=True)
+    store.clear()
+    store[run_id] = {
+        'path': dataset_path,
+        'count': len(examples),
+    }
 
+    st.session_state.dataset_run_id = run_id
+    st.session_state.dataset_stats = builder.get_statistics()
+    st.session_state.dataset_result = {
+        'success': True,
+        'run_id': run_id,
+        'stats': st.session_state.dataset_stats
+    }
+
+
+@st.fragment
 def render_results():
-    """Affiche les résultats de la génération"""
+    """
+    Affiche les résultats de la génération.
+
+    Isolé dans un fragment: les interactions avec le panneau de
+    configuration ne re-rendent plus l'aperçu ni les payloads de
+    téléchargement (seuls les widgets du fragment le relancent).
+    """
     result = st.session_state.dataset_result
 
     if not result.get('success'):
@@ -411,55 +631,75 @@ def render_results():
     with col4:
         st.metric("Temps", f"{stats.get('time_seconds', 0):.1f}s")
 
-    # Répartition par cas d'usage
+    # Répartition par cas d'usage: un seul composant dataframe au lieu
+    # de N colonnes + N metrics remontés à chaque rerun
     by_use_case = stats.get('by_use_case', {})
     if by_use_case:
         st.caption("Répartition par cas d'usage:")
-        cols = st.columns(len(by_use_case))
-        for idx, (uc, count) in enumerate(by_use_case.items()):
-            with cols[idx]:
-                label = USE_CASE_LABELS.get(uc, uc)
-                st.metric(label, count)
+        st.dataframe(
+            pd.DataFrame(
+                [(USE_CASE_LABELS.get(uc, uc), count)
+                 for uc, count in by_use_case.items()],
+                columns=['Cas d\'usage', 'Exemples']
+            ),
+            hide_index=True,
+            use_container_width=True
+        )
 
     # Aperçu
     st.subheader("📋 Aperçu du dataset")
 
-    formatted = result.get('formatted', [])
-    if formatted:
-        preview_count = min(3, len(formatted))
-
-        for i, example in enumerate(formatted[:preview_count]):
-            with st.expander(f"Exemple {i + 1}", expanded=(i == 0)):
-                st.json(example)
+    run_data = _dataset_store().get(result.get('run_id'), {})
+    dataset_path = run_data.get('path')
+    example_count = run_data.get('count', 0)
+
+    if dataset_path and example_count:
+        # Seules les premières lignes du fichier sont relues pour l'aperçu;
+        # un selectbox + un seul st.code remplacent N expanders re-rendus
+        # à chaque interaction
+        with open(dataset_path, 'r', encoding='utf-8') as f:
+            preview_lines = list(islice(f, 3))
+
+        selected = st.selectbox(
+            "Exemple à prévisualiser",
+            options=range(len(preview_lines)),
+            format_func=lambda i: f"Exemple {i + 1}"
+        )
+        st.code(
+            json.dumps(json.loads(preview_lines[selected]),
+                       ensure_ascii=False, indent=2),
+            language='json'
+        )
 
     # Export
     st.subheader("💾 Export")
 
     col1, col2 = st.columns(2)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
     with col1:
-        # Export JSONL
-        jsonl_content = _format_jsonl(formatted)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"dataset_{st.session_state.dataset_format}_{timestamp}.jsonl"
-
+        # Export JSONL: streamé depuis le fichier, pas de chaîne en session
         st.download_button(
             label="📥 Télécharger JSONL",
-            data=jsonl_content,
-            file_name=filename,
+            data=open(dataset_path, 'rb') if dataset_path else b"",
+            file_name=f"dataset_{st.session_state.dataset_format}_{timestamp}.jsonl",
             mime="application/jsonl",
             use_container_width=True
         )
 
     with col2:
-        # Export JSON
-        json_content = json.dumps(formatted, ensure_ascii=False, indent=2)
-        filename_json = f"dataset_{st.session_state.dataset_format}_{timestamp}.json"
+        # Export JSON (minifié = moitié moins volumineux qu'avec indent=2)
+        minify = st.checkbox(
+            "JSON minifié",
+            value=False,
+            help="Sans indentation: fichier environ deux fois plus petit"
+        )
+        json_content = _jsonl_file_to_json(dataset_path, minify) if dataset_path else "[]"
 
         st.download_button(
             label="📥 Télécharger JSON",
             data=json_content,
-            file_name=filename_json,
+            file_name=f"dataset_{st.session_state.dataset_format}_{timestamp}.json",
             mime="application/json",
             use_container_width=True
         )
@@ -472,10 +712,30 @@ def render_results():
                 st.warning(err)
 
 
-def _format_jsonl(examples: List[Dict]) -> str:
-    """Formate les exemples en JSONL"""
-    lines = [json.dumps(ex, ensure_ascii=False) for ex in examples]
-    return "\n".join(lines)
+def _jsonl_file_to_json(jsonl_path: str, minify: bool) -> str:
+    """
+    Convertit le fichier JSONL persisté en un tableau JSON téléchargeable.
+
+    En mode minifié, les lignes (déjà du JSON compact) sont simplement
+    jointes par des virgules — aucun re-parse. Le mode indenté re-parse
+    ligne à ligne dans un StringIO pour éviter une liste intermédiaire.
+    """
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        if minify:
+            return '[' + ','.join(line.rstrip('\n') for line in f if line.strip()) + ']'
+
+        buf = StringIO()
+        buf.write('[\n')
+        first = True
+        for line in f:
+            if not line.strip():
+                continue
+            if not first:
+                buf.write(',\n')
+            buf.write(json.dumps(json.loads(line), ensure_ascii=False, indent=2))
+            first = False
+        buf.write('\n]')
+        return buf.getvalue()
 
 
 def render_dataset_sidebar():
@@ -490,7 +750,10 @@ def render_dataset_sidebar():
 
     # Bouton pour réinitialiser
     if st.sidebar.button("🔄 Nouvelle génération"):
+        run_data = _dataset_store().pop(st.session_state.get('dataset_run_id'), None)
+        if run_data:
+            Path(run_data['path']).unlink(missing_ok=True)
         st.session_state.dataset_result = None
-        st.session_state.dataset_examples = []
+        st.session_state.dataset_run_id = None
         st.session_state.dataset_stats = None
         st.rerun()
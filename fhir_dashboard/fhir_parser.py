@@ -1,30 +1,231 @@
 """
 Parsing et extraction des ressources FHIR
 """
-import pandas as pd
-from datetime import datetime
+from __future__ import annotations
+
+import re
+
+from datetime import datetime, timezone
+from operator import itemgetter
 from typing import Dict, List, Any, Optional
-from collections import defaultdict
 from config import (
     RESOURCE_LABELS, OBSERVATION_CATEGORIES, CLINICAL_STATUS,
     RESOURCE_STATUS, ENCOUNTER_TYPE_MAP, TIMELINE_CATEGORIES,
     SOCIAL_CONDITION_CODES
 )
 
+# pandas est importé paresseusement (voir _ensure_pandas): les
+# consommateurs qui n'utilisent que parse_resources, extract_patient_info
+# ou iter_timeline_events ne paient pas son coût d'import au démarrage.
+pd = None
+
+
+def _ensure_pandas() -> None:
+    """Importe pandas au premier besoin d'un DataFrame."""
+    global pd
+    if pd is None:
+        import pandas
+        pd = pandas
+
+
+def _to_datetime(values) -> pd.Series:
+    """
+    Parse vectorisé des dates FHIR (toujours ISO8601) en datetimes naïfs.
+
+    Le format explicite évite le repli dateutil élément par élément de
+    pd.to_datetime (et son warning "Could not infer format") : le parsing
+    passe par le chemin C vectorisé de pandas.
+
+    Les bundles répètent massivement les mêmes dates (toutes les
+    observations d'une consultation partagent l'effectiveDateTime) :
+    seules les valeurs distinctes sont parsées, puis remappées — le coût
+    suit le nombre de dates uniques et non le nombre de lignes.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    uniques = pd.unique(series)
+    parsed = pd.to_datetime(uniques, format='ISO8601', errors='coerce', utc=True)
+    # La passe tz ne touche que le tableau dédupliqué; la colonne finale
+    # est matérialisée naïve en une fois par le map. On ne retire pas les
+    # offsets côté chaîne: les dates FHIR portent des décalages locaux
+    # (+01:00/+02:00) qu'il faut convertir, pas tronquer.
+    return series.map(dict(zip(uniques, parsed.tz_localize(None))))
+
 
 def parse_resources(bundle: dict) -> Dict[str, List[dict]]:
     """
     Groupe les ressources du bundle par type.
     """
-    resources = defaultdict(list)
+    # setdefault lié en local: pas de LOAD_GLOBAL ni de __missing__ de
+    # defaultdict par entrée sur les gros bundles
+    resources: Dict[str, List[dict]] = {}
+    setdefault = resources.setdefault
 
-    for entry in bundle.get('entry', []):
+    for entry in bundle.get('entry', ()):
         resource = entry.get('resource', {})
         resource_type = resource.get('resourceType')
         if resource_type:
-            resources[resource_type].append(resource)
+            setdefault(resource_type, []).append(resource)
+
+    return resources
+
+
+# --- Événements de timeline ---
+# Un handler par type de ressource datée: chacun retourne le tuple
+# (date, type, catégorie, description, resource_type) d'un événement.
+
+def _encounter_event(enc: dict) -> tuple:
+    types = enc.get('type', [])
+    type_text = types[0].get('text') if types else 'Consultation'
+    return (enc.get('period', {}).get('start'),
+            'Consultation', 'encounter', type_text, 'Encounter')
+
+
+def _condition_event(cond: dict) -> tuple:
+    code_data = cond.get('code', {})
+    display = code_data.get('text') or (
+        code_data.get('coding', [{}])[0].get('display')
+    )
+    return (cond.get('onsetDateTime') or cond.get('recordedDate'),
+            'Diagnostic', 'condition', display, 'Condition')
+
+
+def _procedure_event(proc: dict) -> tuple:
+    code_data = proc.get('code', {})
+    display = code_data.get('text') or (
+        code_data.get('coding', [{}])[0].get('display')
+    )
+    performed = (proc.get('performedDateTime')
+                 or proc.get('performedPeriod', {}).get('start'))
+    return (performed, 'Acte médical', 'procedure', display, 'Procedure')
+
+
+def _medication_event(med: dict) -> tuple:
+    med_cc = med.get('medicationCodeableConcept', {})
+    display = med_cc.get('text') or (
+        med_cc.get('coding', [{}])[0].get('display')
+    )
+    return (med.get('authoredOn'),
+            'Prescription', 'medication', display, 'MedicationRequest')
+
+
+def _immunization_event(imm: dict) -> tuple:
+    vaccine = imm.get('vaccineCode', {})
+    display = vaccine.get('text') or (
+        vaccine.get('coding', [{}])[0].get('display')
+    )
+    return (imm.get('occurrenceDateTime'),
+            'Vaccination', 'immunization', display, 'Immunization')
+
+
+TIMELINE_HANDLERS = {
+    'Encounter': _encounter_event,
+    'Condition': _condition_event,
+    'Procedure': _procedure_event,
+    'MedicationRequest': _medication_event,
+    'Immunization': _immunization_event,
+}
+
+
+def _timeline_df(events: List[tuple]) -> pd.DataFrame:
+    """Construit le DataFrame timeline (trié, sans dates manquantes)."""
+    _ensure_pandas()
+    if not events:
+        return pd.DataFrame()
+
+    dates, event_types, cats, descriptions, resource_types = zip(*events)
+    df = pd.DataFrame({
+        'date': _to_datetime(list(dates)),
+        'type': event_types,
+        'category': cats,
+        'description': descriptions,
+        'resource_type': resource_types,
+    })
+    df = df.dropna(subset=['date'])
+    df = _categorize(df, ('type', 'category', 'resource_type'))
+    return _sort_by_date(df, 'date', ascending=True)
+
+
+def parse_resources_and_timeline(bundle: dict) -> tuple:
+    """
+    Groupe les ressources par type ET extrait les événements de timeline
+    en une seule passe sur les entrées du bundle.
+
+    Retourne (resources par type, DataFrame timeline) — équivaut à
+    parse_resources() suivi de extract_timeline_events() sans repasser
+    sur les cinq listes de ressources.
+    """
+    resources: Dict[str, List[dict]] = {}
+    setdefault = resources.setdefault
+    events = []
+    get_handler = TIMELINE_HANDLERS.get
+
+    for entry in bundle.get('entry', ()):
+        resource = entry.get('resource', {})
+        resource_type = resource.get('resourceType')
+        if not resource_type:
+            continue
+        setdefault(resource_type, []).append(resource)
+        handler = get_handler(resource_type)
+        if handler:
+            events.append(handler(resource))
+
+    return resources, _timeline_df(events)
+
+
+# Détection du NIR : par OID français, par "NIR" dans le système, ou par
+# code "SS" (Social Security) généré par Synthea. Une seule passe regex
+# (insensible à la casse pour NIR) au lieu de trois scans + un .upper()
+# par identifiant.
+_NIR_SYSTEM_RE = re.compile(r'1\.2\.250\.1\.213\.1\.4\.8|[Nn][Ii][Rr]|us-ssn')
+_NIR_TYPE_CODES = frozenset({'SS'})
+
+# Codes sociaux figés une fois pour le isin vectorisé des extracteurs
+_SOCIAL_CODES = frozenset(SOCIAL_CONDITION_CODES)
+
+
+# Dict vide partagé: _first_coding n'alloue rien pour les
+# CodeableConcept sans coding
+_EMPTY: dict = {}
+
+
+def _first_coding(node: dict) -> tuple:
+    """
+    Extrait (code, display, system) du premier coding d'un CodeableConcept,
+    avec repli sur node['text'] pour le display — factorise le motif
+    codings[0] répété dans tous les extracteurs (un seul .get par champ).
+    """
+    codings = node.get('coding')
+    coding = codings[0] if codings else _EMPTY
+    return (coding.get('code'),
+            coding.get('display') or node.get('text'),
+            coding.get('system', ''))
 
-    return dict(resources)
+
+def _sort_by_date(df: pd.DataFrame, column: str,
+                  ascending: bool = False) -> pd.DataFrame:
+    """
+    Trie sur une colonne datetime via argsort numpy (chemin C stable)
+    plutôt que le chemin générique de sort_values. En descendant, les
+    NaT (int64 min) finissent en queue, comme avec sort_values.
+    """
+    import numpy as np
+
+    values = df[column].to_numpy(dtype='datetime64[ns]').view('i8')
+    order = np.argsort(values, kind='stable')
+    if not ascending:
+        order = order[::-1]
+    return df.take(order)
+
+
+def _categorize(df: pd.DataFrame, columns: tuple) -> pd.DataFrame:
+    """
+    Passe les colonnes à faible cardinalité en dtype category : un code
+    par valeur distincte au lieu d'un pointeur str Python par ligne
+    (mémoire fortement réduite, filtres/groupby sur le dictionnaire).
+    """
+    for col in columns:
+        df[col] = df[col].astype('category')
+    return df
 
 
 def extract_patient_info(patient: dict) -> dict:
@@ -34,7 +235,9 @@ def extract_patient_info(patient: dict) -> dict:
     # Nom
     names = patient.get('name', [])
     name_data = names[0] if names else {}
-    full_name = ' '.join(name_data.get('given', [])) + ' ' + name_data.get('family', '')
+    given_name = ' '.join(name_data.get('given', ()))
+    family_name = name_data.get('family', '')
+    full_name = given_name + ' ' + family_name
 
     # Adresse
     addresses = patient.get('address', [])
@@ -53,12 +256,7 @@ def extract_patient_info(patient: dict) -> dict:
         type_codings = ident_type.get('coding', [])
         type_code = type_codings[0].get('code') if type_codings else None
 
-        # Détecter NIR : par OID français, par "NIR" dans le système,
-        # ou par code "SS" (Social Security) généré par Synthea
-        if ('1.2.250.1.213.1.4.8' in system or
-            'NIR' in system.upper() or
-            'us-ssn' in system or
-            type_code == 'SS'):
+        if _NIR_SYSTEM_RE.search(system) or type_code in _NIR_TYPE_CODES:
             nir = ident.get('value')
             break
 
@@ -70,15 +268,17 @@ def extract_patient_info(patient: dict) -> dict:
             bp = ext.get('valueAddress', {})
             birth_place = f"{bp.get('city', '')}, {bp.get('state', '')}"
 
+    deceased_date = patient.get('deceasedDateTime')
+
     return {
         'id': patient.get('id'),
         'name': full_name.strip(),
-        'given_name': ' '.join(name_data.get('given', [])),
-        'family_name': name_data.get('family', ''),
+        'given_name': given_name,
+        'family_name': family_name,
         'gender': patient.get('gender'),
         'birth_date': patient.get('birthDate'),
-        'deceased_date': patient.get('deceasedDateTime'),
-        'is_deceased': patient.get('deceasedDateTime') is not None,
+        'deceased_date': deceased_date,
+        'is_deceased': deceased_date is not None,
         'city': address.get('city'),
         'region': address.get('state'),
         'postal_code': address.get('postalCode'),
@@ -90,17 +290,85 @@ def extract_patient_info(patient: dict) -> dict:
     }
 
 
+# Schémas de colonnes des extracteurs: les DataFrames vides gardent la
+# bonne structure pour les consommateurs en aval (filtres, affichage)
+_OBSERVATION_COLUMNS = (
+    'id', 'date', 'code', 'display', 'system', 'category', 'category_code',
+    'value', 'unit', 'value_string', 'status', 'has_components',
+)
+_CONDITION_COLUMNS = (
+    'id', 'onset_date', 'abatement_date', 'code', 'display', 'system',
+    'clinical_status', 'clinical_status_code', 'verification_status',
+    'is_active', 'is_social',
+)
+_MEDICATION_COLUMNS = (
+    'id', 'date', 'code', 'display', 'system', 'status', 'is_active',
+)
+_ENCOUNTER_COLUMNS = (
+    'id', 'start', 'end', 'duration_minutes', 'type', 'type_code',
+    'class', 'class_code', 'status', 'provider', 'practitioner', 'reason',
+)
+_IMMUNIZATION_COLUMNS = (
+    'id', 'date', 'code', 'display', 'system', 'status', 'primary_source',
+)
+_PROCEDURE_COLUMNS = (
+    'id', 'date', 'code', 'display', 'system', 'status',
+)
+_ALLERGY_COLUMNS = (
+    'id', 'date', 'code', 'display', 'system', 'clinical_status',
+    'type', 'category',
+)
+
+
 def extract_observations_df(observations: List[dict]) -> pd.DataFrame:
     """
     Convertit les observations en DataFrame.
-    """
-    rows = []
 
-    for obs in observations:
+    Accumulation colonnaire (une liste par colonne) plutôt qu'une liste
+    de dicts : pandas construit chaque colonne d'un bloc, sans inférence
+    de schéma ligne à ligne.
+
+    Les composants (observations multi-valeurs type pression artérielle)
+    sont accumulés à part puis concaténés en un seul pd.concat final :
+    la boucle principale reste à une ligne par observation, pré-dimensionnée.
+    """
+    _ensure_pandas()
+    if not observations:
+        return pd.DataFrame(columns=_OBSERVATION_COLUMNS)
+
+    n = len(observations)
+    ids = [None] * n
+    dates = [None] * n
+    codes = [None] * n
+    displays = [None] * n
+    systems = [None] * n
+    cats = [None] * n
+    cat_codes = [None] * n
+    values = [None] * n
+    units = [None] * n
+    value_strings = [None] * n
+    statuses = [None] * n
+    has_comps = [False] * n
+
+    # Colonnes des lignes composants (minoritaires: append suffit)
+    c_ids = []
+    c_dates = []
+    c_codes = []
+    c_displays = []
+    c_systems = []
+    c_cats = []
+    c_cat_codes = []
+    c_values = []
+    c_units = []
+    c_statuses = []
+
+    # .get liés en locaux: pas de LOAD_GLOBAL+LOAD_ATTR par ligne
+    cat_tr = OBSERVATION_CATEGORIES.get
+    status_tr = RESOURCE_STATUS.get
+
+    for i, obs in enumerate(observations):
         # Code et display
-        code_data = obs.get('code', {})
-        codings = code_data.get('coding', [])
-        coding = codings[0] if codings else {}
+        obs_code, obs_display, obs_system = _first_coding(obs.get('code', {}))
 
         # Catégorie
         categories = obs.get('category', [])
@@ -132,26 +400,28 @@ def extract_observations_df(observations: List[dict]) -> pd.DataFrame:
         # Composants (pour observations multi-valeurs comme pression artérielle)
         components = obs.get('component', [])
 
-        rows.append({
-            'id': obs.get('id'),
-            'date': obs.get('effectiveDateTime') or obs.get('issued'),
-            'code': coding.get('code'),
-            'display': coding.get('display') or code_data.get('text'),
-            'system': coding.get('system', ''),
-            'category': OBSERVATION_CATEGORIES.get(category, category),
-            'category_code': category,
-            'value': value,
-            'unit': unit,
-            'value_string': value_string,
-            'status': RESOURCE_STATUS.get(obs.get('status'), obs.get('status')),
-            'has_components': len(components) > 0,
-        })
-
-        # Ajouter les composants comme lignes séparées
+        obs_id = obs.get('id')
+        obs_date = obs.get('effectiveDateTime') or obs.get('issued')
+        cat_display = cat_tr(category, category)
+        obs_status = obs.get('status')
+        status = status_tr(obs_status, obs_status)
+
+        ids[i] = obs_id
+        dates[i] = obs_date
+        codes[i] = obs_code
+        displays[i] = obs_display
+        systems[i] = obs_system
+        cats[i] = cat_display
+        cat_codes[i] = category
+        values[i] = value
+        units[i] = unit
+        value_strings[i] = value_string
+        statuses[i] = status
+        has_comps[i] = len(components) > 0
+
+        # Composants accumulés à part, concaténés après la boucle
         for comp in components:
-            comp_code = comp.get('code', {})
-            comp_codings = comp_code.get('coding', [])
-            comp_coding = comp_codings[0] if comp_codings else {}
+            c_code, c_display, c_system = _first_coding(comp.get('code', {}))
 
             comp_value = None
             comp_unit = None
@@ -160,40 +430,76 @@ def extract_observations_df(observations: List[dict]) -> pd.DataFrame:
                 comp_value = vq.get('value')
                 comp_unit = vq.get('unit', vq.get('code', ''))
 
-            rows.append({
-                'id': f"{obs.get('id')}_comp",
-                'date': obs.get('effectiveDateTime') or obs.get('issued'),
-                'code': comp_coding.get('code'),
-                'display': comp_coding.get('display') or comp_code.get('text'),
-                'system': comp_coding.get('system', ''),
-                'category': OBSERVATION_CATEGORIES.get(category, category),
-                'category_code': category,
-                'value': comp_value,
-                'unit': comp_unit,
-                'value_string': None,
-                'status': RESOURCE_STATUS.get(obs.get('status'), obs.get('status')),
-                'has_components': False,
-            })
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
-        df['date'] = df['date'].dt.tz_localize(None)
-        df = df.sort_values('date', ascending=False)
-
-    return df
+            c_ids.append(f"{obs_id}_comp")
+            c_dates.append(obs_date)
+            c_codes.append(c_code)
+            c_displays.append(c_display)
+            c_systems.append(c_system)
+            c_cats.append(cat_display)
+            c_cat_codes.append(category)
+            c_values.append(comp_value)
+            c_units.append(comp_unit)
+            c_statuses.append(status)
+
+    df = pd.DataFrame({
+        'id': ids,
+        'date': _to_datetime(dates),
+        'code': codes,
+        'display': displays,
+        'system': systems,
+        'category': cats,
+        'category_code': cat_codes,
+        'value': values,
+        'unit': units,
+        'value_string': value_strings,
+        'status': statuses,
+        'has_components': has_comps,
+    })
+    if c_ids:
+        comp_df = pd.DataFrame({
+            'id': c_ids,
+            'date': _to_datetime(c_dates),
+            'code': c_codes,
+            'display': c_displays,
+            'system': c_systems,
+            'category': c_cats,
+            'category_code': c_cat_codes,
+            'value': c_values,
+            'unit': c_units,
+            'value_string': None,
+            'status': c_statuses,
+            'has_components': False,
+        })
+        df = pd.concat([df, comp_df], ignore_index=True)
+    df = _categorize(df, ('category', 'category_code', 'system', 'status'))
+    return _sort_by_date(df, 'date')
 
 
 def extract_conditions_df(conditions: List[dict]) -> pd.DataFrame:
     """
     Convertit les conditions/diagnostics en DataFrame.
     """
-    rows = []
-
-    for cond in conditions:
-        code_data = cond.get('code', {})
-        codings = code_data.get('coding', [])
-        coding = codings[0] if codings else {}
+    _ensure_pandas()
+    if not conditions:
+        return pd.DataFrame(columns=_CONDITION_COLUMNS)
+
+    # Listes pré-dimensionnées (une ligne par ressource): pas de
+    # réallocations amorties pendant la boucle
+    n = len(conditions)
+    ids = [None] * n
+    onset_dates = [None] * n
+    abatement_dates = [None] * n
+    codes = [None] * n
+    displays = [None] * n
+    systems = [None] * n
+    clinical_statuses = [None] * n
+    clinical_status_codes = [None] * n
+    verification_statuses = [None] * n
+
+    cs_tr = CLINICAL_STATUS.get
+
+    for i, cond in enumerate(conditions):
+        code, display, system = _first_coding(cond.get('code', {}))
 
         # Statut clinique
         clinical_status = cond.get('clinicalStatus', {})
@@ -205,73 +511,108 @@ def extract_conditions_df(conditions: List[dict]) -> pd.DataFrame:
         vs_codings = verification.get('coding', [])
         vs_code = vs_codings[0].get('code') if vs_codings else None
 
-        # Déterminer si c'est une condition sociale (emploi, casier, etc.)
-        condition_code = coding.get('code', '')
-        is_social = condition_code in SOCIAL_CONDITION_CODES
-
-        rows.append({
-            'id': cond.get('id'),
-            'onset_date': cond.get('onsetDateTime') or cond.get('recordedDate'),
-            'abatement_date': cond.get('abatementDateTime'),
-            'code': condition_code,
-            'display': coding.get('display') or code_data.get('text'),
-            'system': coding.get('system', ''),
-            'clinical_status': CLINICAL_STATUS.get(cs_code, cs_code),
-            'clinical_status_code': cs_code,
-            'verification_status': vs_code,
-            'is_active': cs_code == 'active',
-            'is_social': is_social,
-        })
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df['onset_date'] = pd.to_datetime(df['onset_date'], errors='coerce', utc=True)
-        df['onset_date'] = df['onset_date'].dt.tz_localize(None)
-        df['abatement_date'] = pd.to_datetime(df['abatement_date'], errors='coerce', utc=True)
-        df['abatement_date'] = df['abatement_date'].dt.tz_localize(None)
-        df = df.sort_values('onset_date', ascending=False)
-
-    return df
+        ids[i] = cond.get('id')
+        onset_dates[i] = cond.get('onsetDateTime') or cond.get('recordedDate')
+        abatement_dates[i] = cond.get('abatementDateTime')
+        codes[i] = code or ''
+        displays[i] = display
+        systems[i] = system
+        clinical_statuses[i] = cs_tr(cs_code, cs_code)
+        clinical_status_codes[i] = cs_code
+        verification_statuses[i] = vs_code
+
+    df = pd.DataFrame({
+        'id': ids,
+        'onset_date': _to_datetime(onset_dates),
+        'abatement_date': _to_datetime(abatement_dates),
+        'code': codes,
+        'display': displays,
+        'system': systems,
+        'clinical_status': clinical_statuses,
+        'clinical_status_code': clinical_status_codes,
+        'verification_status': verification_statuses,
+    })
+    # Drapeaux calculés en vectorisé (isin/eq C-level) plutôt que par des
+    # tests d'appartenance Python dans la boucle. is_social: conditions
+    # sociales (emploi, casier, etc.)
+    df['is_active'] = df['clinical_status_code'].eq('active')
+    df['is_social'] = df['code'].isin(_SOCIAL_CODES)
+    df = _categorize(df, ('system', 'clinical_status', 'clinical_status_code',
+                          'verification_status'))
+    return _sort_by_date(df, 'onset_date')
 
 
 def extract_medications_df(medications: List[dict]) -> pd.DataFrame:
     """
     Convertit les prescriptions en DataFrame.
     """
-    rows = []
-
-    for med in medications:
+    _ensure_pandas()
+    if not medications:
+        return pd.DataFrame(columns=_MEDICATION_COLUMNS)
+
+    n = len(medications)
+    ids = [None] * n
+    dates = [None] * n
+    codes = [None] * n
+    displays = [None] * n
+    systems = [None] * n
+    statuses = [None] * n
+    actives = [None] * n
+
+    status_tr = RESOURCE_STATUS.get
+
+    for i, med in enumerate(medications):
         # Médicament
-        med_cc = med.get('medicationCodeableConcept', {})
-        codings = med_cc.get('coding', [])
-        coding = codings[0] if codings else {}
-
-        rows.append({
-            'id': med.get('id'),
-            'date': med.get('authoredOn'),
-            'code': coding.get('code'),
-            'display': coding.get('display') or med_cc.get('text'),
-            'system': coding.get('system', ''),
-            'status': RESOURCE_STATUS.get(med.get('status'), med.get('status')),
-            'is_active': med.get('status') == 'active',
-        })
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
-        df['date'] = df['date'].dt.tz_localize(None)
-        df = df.sort_values('date', ascending=False)
-
-    return df
+        code, display, system = _first_coding(
+            med.get('medicationCodeableConcept', {}))
+        status = med.get('status')
+
+        ids[i] = med.get('id')
+        dates[i] = med.get('authoredOn')
+        codes[i] = code
+        displays[i] = display
+        systems[i] = system
+        statuses[i] = status_tr(status, status)
+        actives[i] = status == 'active'
+
+    df = pd.DataFrame({
+        'id': ids,
+        'date': _to_datetime(dates),
+        'code': codes,
+        'display': displays,
+        'system': systems,
+        'status': statuses,
+        'is_active': actives,
+    })
+    df = _categorize(df, ('system', 'status'))
+    return _sort_by_date(df, 'date')
 
 
 def extract_encounters_df(encounters: List[dict]) -> pd.DataFrame:
     """
     Convertit les consultations en DataFrame avec détails complets.
     """
-    rows = []
-
-    for enc in encounters:
+    _ensure_pandas()
+    if not encounters:
+        return pd.DataFrame(columns=_ENCOUNTER_COLUMNS)
+
+    n = len(encounters)
+    ids = [None] * n
+    starts = [None] * n
+    ends = [None] * n
+    type_texts = [None] * n
+    type_codes = [None] * n
+    classes = [None] * n
+    class_codes = [None] * n
+    statuses = [None] * n
+    providers = [None] * n
+    practitioners = [None] * n
+    reason_texts = [None] * n
+
+    status_tr = RESOURCE_STATUS.get
+    enc_tr = ENCOUNTER_TYPE_MAP.get
+
+    for i, enc in enumerate(encounters):
         # Type
         types = enc.get('type', [])
         type_text = types[0].get('text') if types else None
@@ -288,14 +629,13 @@ def extract_encounters_df(encounters: List[dict]) -> pd.DataFrame:
         # Provider (établissement)
         service_provider = enc.get('serviceProvider', {})
 
-        # Motif de consultation
-        reason_codes = enc.get('reasonCode', [])
-        reasons = []
-        for reason in reason_codes:
-            codings = reason.get('coding', [])
-            if codings:
-                reasons.append(codings[0].get('display', ''))
-        reason_text = ', '.join(filter(None, reasons)) or None
+        # Motif de consultation: jointure directe en générateur,
+        # sans liste intermédiaire à filtrer
+        reason_text = ', '.join(
+            d for reason in enc.get('reasonCode', ())
+            for coding in reason.get('coding', ())[:1]
+            if (d := coding.get('display'))
+        ) or None
 
         # Médecin participant
         participants = enc.get('participant', [])
@@ -306,139 +646,179 @@ def extract_encounters_df(encounters: List[dict]) -> pd.DataFrame:
                 practitioner = individual.get('display')
                 break
 
-        # Durée en minutes
-        duration = None
-        if period.get('start') and period.get('end'):
-            try:
-                from dateutil import parser as date_parser
-                start_dt = date_parser.parse(period['start'])
-                end_dt = date_parser.parse(period['end'])
-                duration = int((end_dt - start_dt).total_seconds() / 60)
-            except:
-                pass
-
-        rows.append({
-            'id': enc.get('id'),
-            'start': period.get('start'),
-            'end': period.get('end'),
-            'duration_minutes': duration,
-            'type': type_text or ENCOUNTER_TYPE_MAP.get(type_code, type_code),
-            'type_code': type_code,
-            'class': ENCOUNTER_TYPE_MAP.get(class_code, class_code),
-            'class_code': class_code,
-            'status': RESOURCE_STATUS.get(enc.get('status'), enc.get('status')),
-            'provider': service_provider.get('display'),
-            'practitioner': practitioner,
-            'reason': reason_text,
-        })
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df['start'] = pd.to_datetime(df['start'], errors='coerce', utc=True)
-        df['end'] = pd.to_datetime(df['end'], errors='coerce', utc=True)
-        df['start'] = df['start'].dt.tz_localize(None)
-        df['end'] = df['end'].dt.tz_localize(None)
-        df = df.sort_values('start', ascending=False)
-
-    return df
+        status = enc.get('status')
+
+        ids[i] = enc.get('id')
+        starts[i] = period.get('start')
+        ends[i] = period.get('end')
+        type_texts[i] = type_text or enc_tr(type_code, type_code)
+        type_codes[i] = type_code
+        classes[i] = enc_tr(class_code, class_code)
+        class_codes[i] = class_code
+        statuses[i] = status_tr(status, status)
+        providers[i] = service_provider.get('display')
+        practitioners[i] = practitioner
+        reason_texts[i] = reason_text
+
+    # Durée en minutes, calculée en vectorisé sur les colonnes parsées
+    # (plus de dateutil.parser.parse par consultation dans la boucle)
+    start_dt = _to_datetime(starts)
+    end_dt = _to_datetime(ends)
+    durations = ((end_dt - start_dt).dt.total_seconds() // 60).astype('Int64')
+
+    df = pd.DataFrame({
+        'id': ids,
+        'start': start_dt,
+        'end': end_dt,
+        'duration_minutes': durations,
+        'type': type_texts,
+        'type_code': type_codes,
+        'class': classes,
+        'class_code': class_codes,
+        'status': statuses,
+        'provider': providers,
+        'practitioner': practitioners,
+        'reason': reason_texts,
+    })
+    df = _categorize(df, ('type', 'type_code', 'class', 'class_code', 'status'))
+    return _sort_by_date(df, 'start')
 
 
 def extract_immunizations_df(immunizations: List[dict]) -> pd.DataFrame:
     """
     Convertit les vaccinations en DataFrame.
     """
-    rows = []
-
-    for imm in immunizations:
-        vaccine = imm.get('vaccineCode', {})
-        codings = vaccine.get('coding', [])
-        coding = codings[0] if codings else {}
-
-        rows.append({
-            'id': imm.get('id'),
-            'date': imm.get('occurrenceDateTime'),
-            'code': coding.get('code'),
-            'display': coding.get('display') or vaccine.get('text'),
-            'system': coding.get('system', ''),
-            'status': RESOURCE_STATUS.get(imm.get('status'), imm.get('status')),
-            'primary_source': imm.get('primarySource', True),
-        })
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
-        df['date'] = df['date'].dt.tz_localize(None)
-        df = df.sort_values('date', ascending=False)
-
-    return df
+    _ensure_pandas()
+    if not immunizations:
+        return pd.DataFrame(columns=_IMMUNIZATION_COLUMNS)
+
+    n = len(immunizations)
+    ids = [None] * n
+    dates = [None] * n
+    codes = [None] * n
+    displays = [None] * n
+    systems = [None] * n
+    statuses = [None] * n
+    primary_sources = [None] * n
+
+    status_tr = RESOURCE_STATUS.get
+
+    for i, imm in enumerate(immunizations):
+        code, display, system = _first_coding(imm.get('vaccineCode', {}))
+        status = imm.get('status')
+
+        ids[i] = imm.get('id')
+        dates[i] = imm.get('occurrenceDateTime')
+        codes[i] = code
+        displays[i] = display
+        systems[i] = system
+        statuses[i] = status_tr(status, status)
+        primary_sources[i] = imm.get('primarySource', True)
+
+    df = pd.DataFrame({
+        'id': ids,
+        'date': _to_datetime(dates),
+        'code': codes,
+        'display': displays,
+        'system': systems,
+        'status': statuses,
+        'primary_source': primary_sources,
+    })
+    df = _categorize(df, ('system', 'status'))
+    return _sort_by_date(df, 'date')
 
 
 def extract_procedures_df(procedures: List[dict]) -> pd.DataFrame:
     """
     Convertit les procédures/actes médicaux en DataFrame.
     """
-    rows = []
-
-    for proc in procedures:
-        code_data = proc.get('code', {})
-        codings = code_data.get('coding', [])
-        coding = codings[0] if codings else {}
-
-        # Date
-        performed = proc.get('performedDateTime') or proc.get('performedPeriod', {}).get('start')
-
-        rows.append({
-            'id': proc.get('id'),
-            'date': performed,
-            'code': coding.get('code'),
-            'display': coding.get('display') or code_data.get('text'),
-            'system': coding.get('system', ''),
-            'status': RESOURCE_STATUS.get(proc.get('status'), proc.get('status')),
-        })
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
-        df['date'] = df['date'].dt.tz_localize(None)
-        df = df.sort_values('date', ascending=False)
-
-    return df
+    _ensure_pandas()
+    if not procedures:
+        return pd.DataFrame(columns=_PROCEDURE_COLUMNS)
+
+    n = len(procedures)
+    ids = [None] * n
+    dates = [None] * n
+    codes = [None] * n
+    displays = [None] * n
+    systems = [None] * n
+    statuses = [None] * n
+
+    status_tr = RESOURCE_STATUS.get
+
+    for i, proc in enumerate(procedures):
+        code, display, system = _first_coding(proc.get('code', {}))
+        status = proc.get('status')
+
+        ids[i] = proc.get('id')
+        dates[i] = (proc.get('performedDateTime')
+                    or proc.get('performedPeriod', {}).get('start'))
+        codes[i] = code
+        displays[i] = display
+        systems[i] = system
+        statuses[i] = status_tr(status, status)
+
+    df = pd.DataFrame({
+        'id': ids,
+        'date': _to_datetime(dates),
+        'code': codes,
+        'display': displays,
+        'system': systems,
+        'status': statuses,
+    })
+    df = _categorize(df, ('system', 'status'))
+    return _sort_by_date(df, 'date')
 
 
 def extract_allergies_df(allergies: List[dict]) -> pd.DataFrame:
     """
     Convertit les allergies en DataFrame.
     """
-    rows = []
+    _ensure_pandas()
+    if not allergies:
+        return pd.DataFrame(columns=_ALLERGY_COLUMNS)
 
-    for allergy in allergies:
-        code_data = allergy.get('code', {})
-        codings = code_data.get('coding', [])
-        coding = codings[0] if codings else {}
+    n = len(allergies)
+    ids = [None] * n
+    dates = [None] * n
+    codes = [None] * n
+    displays = [None] * n
+    systems = [None] * n
+    clinical_statuses = [None] * n
+    types = [None] * n
+    cats = [None] * n
+
+    cs_tr = CLINICAL_STATUS.get
+
+    for i, allergy in enumerate(allergies):
+        code, display, system = _first_coding(allergy.get('code', {}))
 
         # Statut clinique
         clinical_status = allergy.get('clinicalStatus', {})
         cs_codings = clinical_status.get('coding', [])
         cs_code = cs_codings[0].get('code') if cs_codings else None
 
-        rows.append({
-            'id': allergy.get('id'),
-            'date': allergy.get('recordedDate') or allergy.get('onsetDateTime'),
-            'code': coding.get('code'),
-            'display': coding.get('display') or code_data.get('text'),
-            'system': coding.get('system', ''),
-            'clinical_status': CLINICAL_STATUS.get(cs_code, cs_code),
-            'type': allergy.get('type'),
-            'category': ', '.join(allergy.get('category', [])),
-        })
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
-        df['date'] = df['date'].dt.tz_localize(None)
-        df = df.sort_values('date', ascending=False)
-
-    return df
+        ids[i] = allergy.get('id')
+        dates[i] = allergy.get('recordedDate') or allergy.get('onsetDateTime')
+        codes[i] = code
+        displays[i] = display
+        systems[i] = system
+        clinical_statuses[i] = cs_tr(cs_code, cs_code)
+        types[i] = allergy.get('type')
+        cats[i] = ', '.join(allergy.get('category', []))
+
+    df = pd.DataFrame({
+        'id': ids,
+        'date': _to_datetime(dates),
+        'code': codes,
+        'display': displays,
+        'system': systems,
+        'clinical_status': clinical_statuses,
+        'type': types,
+        'category': cats,
+    })
+    df = _categorize(df, ('system', 'clinical_status', 'type', 'category'))
+    return _sort_by_date(df, 'date')
 
 
 def extract_timeline_events(resources: Dict[str, List[dict]]) -> pd.DataFrame:
@@ -446,87 +826,35 @@ def extract_timeline_events(resources: Dict[str, List[dict]]) -> pd.DataFrame:
     Extrait tous les événements datés pour la timeline.
     """
     events = []
+    for resource_type, handler in TIMELINE_HANDLERS.items():
+        for resource in resources.get(resource_type, []):
+            events.append(handler(resource))
 
-    # Consultations
-    for enc in resources.get('Encounter', []):
-        period = enc.get('period', {})
-        types = enc.get('type', [])
-        type_text = types[0].get('text') if types else 'Consultation'
-
-        events.append({
-            'date': period.get('start'),
-            'type': 'Consultation',
-            'category': 'encounter',
-            'description': type_text,
-            'resource_type': 'Encounter',
-        })
+    return _timeline_df(events)
 
-    # Diagnostics
-    for cond in resources.get('Condition', []):
-        code_data = cond.get('code', {})
-        display = code_data.get('text') or (
-            code_data.get('coding', [{}])[0].get('display')
-        )
-
-        events.append({
-            'date': cond.get('onsetDateTime') or cond.get('recordedDate'),
-            'type': 'Diagnostic',
-            'category': 'condition',
-            'description': display,
-            'resource_type': 'Condition',
-        })
-
-    # Procédures
-    for proc in resources.get('Procedure', []):
-        code_data = proc.get('code', {})
-        display = code_data.get('text') or (
-            code_data.get('coding', [{}])[0].get('display')
-        )
-        performed = proc.get('performedDateTime') or proc.get('performedPeriod', {}).get('start')
-
-        events.append({
-            'date': performed,
-            'type': 'Acte médical',
-            'category': 'procedure',
-            'description': display,
-            'resource_type': 'Procedure',
-        })
-
-    # Prescriptions
-    for med in resources.get('MedicationRequest', []):
-        med_cc = med.get('medicationCodeableConcept', {})
-        display = med_cc.get('text') or (
-            med_cc.get('coding', [{}])[0].get('display')
-        )
-
-        events.append({
-            'date': med.get('authoredOn'),
-            'type': 'Prescription',
-            'category': 'medication',
-            'description': display,
-            'resource_type': 'MedicationRequest',
-        })
-
-    # Vaccinations
-    for imm in resources.get('Immunization', []):
-        vaccine = imm.get('vaccineCode', {})
-        display = vaccine.get('text') or (
-            vaccine.get('coding', [{}])[0].get('display')
-        )
-
-        events.append({
-            'date': imm.get('occurrenceDateTime'),
-            'type': 'Vaccination',
-            'category': 'immunization',
-            'description': display,
-            'resource_type': 'Immunization',
-        })
 
-    df = pd.DataFrame(events)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
-        df['date'] = df['date'].dt.tz_localize(None)
-        df = df.dropna(subset=['date'])
-        df = df.sort_values('date')
+def iter_timeline_events(resources: Dict[str, List[dict]]) -> List[tuple]:
+    """
+    Variante allégée de extract_timeline_events pour les consommateurs
+    qui ne font qu'itérer sur les événements triés : retourne une liste
+    de tuples (datetime naïf, type, catégorie, description, resource_type)
+    sans construire de DataFrame.
+    """
+    events = []
 
-    return df
+    for resource_type, handler in TIMELINE_HANDLERS.items():
+        for resource in resources.get(resource_type, []):
+            date_str, event_type, category, description, rt = handler(resource)
+            if not date_str:
+                continue
+            try:
+                dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            # Naïf UTC, comme les colonnes des DataFrames
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            events.append((dt, event_type, category, description, rt))
+
+    events.sort(key=itemgetter(0))
+    return events
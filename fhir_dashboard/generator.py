@@ -2,18 +2,31 @@
 Générateur de cohortes synthétiques - Intégration Synthea
 """
 
-import csv
+import functools
 import json
 import os
+import queue
 import random
 import re
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import shutil
 
+try:
+    import orjson
+except ImportError:  # orjson optionnel, repli sur le json standard
+    orjson = None
+
+
+def _json_loads_bytes(raw: bytes):
+    """Parse des octets JSON pré-lus (orjson quand il est disponible)."""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
 
 # Chemins Synthea
 SYNTHEA_PROJECT_PATH = Path(__file__).parent.parent
@@ -23,24 +36,30 @@ FHIR_OUTPUT_PATH = SYNTHEA_PROJECT_PATH / "output" / "fhir"
 DEMOGRAPHICS_PATH = SYNTHEA_PROJECT_PATH / "src" / "main" / "resources" / "geography" / "demographics_fr.csv"
 
 
+@functools.lru_cache(maxsize=1)
 def load_region_populations() -> Dict[str, int]:
     """
     Charge les populations par région depuis le fichier demographics.
     Retourne un dict {region_name: total_population}
+
+    Mémoïsé: le fichier ne change pas pendant la vie du process, inutile
+    de re-parser le CSV à chaque génération (cache_clear() pour forcer).
+
+    Agrégation vectorisée: le parser C de pandas ne lit que les deux
+    colonnes utiles et le groupby somme en C, sans boucle Python par ligne.
     """
-    regions = {}
     try:
-        with open(DEMOGRAPHICS_PATH, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                region = row.get('STNAME', '')
-                pop = int(row.get('TOT_POP', 0))
-                if region:
-                    regions[region] = regions.get(region, 0) + pop
-    except Exception as e:
+        import pandas as pd
+
+        df = pd.read_csv(
+            DEMOGRAPHICS_PATH,
+            usecols=['STNAME', 'TOT_POP'],
+            dtype={'STNAME': 'string', 'TOT_POP': 'int64'},
+        )
+        return df.groupby('STNAME', sort=False)['TOT_POP'].sum().to_dict()
+    except Exception:
         # Fallback: retourne Île-de-France par défaut si erreur
         return {"Île-de-France": 1}
-    return regions
 
 
 def distribute_patients_by_region(
@@ -51,29 +70,34 @@ def distribute_patients_by_region(
     Distribue les patients proportionnellement aux populations régionales.
     Retourne une liste de (region_name, patient_count).
     Utilise un algorithme qui garantit que le total = total_patients.
+
+    Méthode des plus forts restes en numpy : arithmétique vectorielle
+    pour les proportions/planchers, et np.argpartition (sélection O(N))
+    pour attribuer les restes, sans dicts intermédiaires.
     """
+    import numpy as np
+
     total_pop = sum(regions.values())
     if total_pop == 0:
         return [("Île-de-France", total_patients)]
 
-    # Calcul des proportions exactes
-    proportions = {r: (p / total_pop) * total_patients for r, p in regions.items()}
+    names = list(regions.keys())
+    pops = np.fromiter(regions.values(), dtype=np.int64, count=len(names))
 
-    # Arrondir à l'entier inférieur
-    distribution = {r: int(p) for r, p in proportions.items()}
+    # Proportions exactes puis arrondi à l'entier inférieur
+    props = pops * (total_patients / total_pop)
+    counts = props.astype(np.int64)
 
-    # Distribuer les patients restants aux régions avec la plus grande partie décimale
-    remaining = total_patients - sum(distribution.values())
+    # Les patients restants vont aux plus grandes parties décimales:
+    # partition partielle plutôt que tri complet
+    remaining = total_patients - int(counts.sum())
     if remaining > 0:
-        decimals = {r: proportions[r] - distribution[r] for r in proportions}
-        sorted_by_decimal = sorted(decimals.items(), key=lambda x: x[1], reverse=True)
-        for i, (region, _) in enumerate(sorted_by_decimal):
-            if i >= remaining:
-                break
-            distribution[region] += 1
+        frac = props - counts
+        top_idx = np.argpartition(-frac, remaining - 1)[:remaining]
+        counts[top_idx] += 1
 
     # Filtrer les régions avec 0 patients et trier par population
-    result = [(r, c) for r, c in distribution.items() if c > 0]
+    result = [(names[i], int(counts[i])) for i in np.nonzero(counts)[0]]
     result.sort(key=lambda x: x[1], reverse=True)
     return result
 
@@ -124,6 +148,11 @@ PATHOLOGY_CATEGORIES = {
     ]
 }
 
+# Index inverse module -> catégorie, construit une fois à l'import
+MODULE_TO_CATEGORY = {
+    m: cat for cat, names in PATHOLOGY_CATEGORIES.items() for m in names
+}
+
 # Labels français pour les modules
 MODULE_LABELS_FR = {
     "hypertension": "Hypertension",
@@ -214,8 +243,18 @@ GENDER_DISTRIBUTION = {
     "sleep_apnea": (0.35, 0.65),     # 65% hommes
 }
 
+# Ensembles figés précalculés à l'import depuis GENDER_DISTRIBUTION:
+# modules 100% féminins et 100% masculins. Le filtre de genre se réduit
+# à deux tests d'intersection sur ces frozensets.
+EXCLUSIVE_FEMALE = frozenset(
+    m for m, (f, _) in GENDER_DISTRIBUTION.items() if f == 1.0
+)
+EXCLUSIVE_MALE = frozenset(
+    m for m, (_, h) in GENDER_DISTRIBUTION.items() if h == 1.0
+)
+
 
-def get_optimal_gender_filter(selected_modules: List[str]) -> Optional[str]:
+def get_optimal_gender_filter(selected_modules: Iterable[str]) -> Optional[str]:
     """
     Détermine le filtre de genre optimal basé sur les pathologies sélectionnées.
 
@@ -228,25 +267,17 @@ def get_optimal_gender_filter(selected_modules: List[str]) -> Optional[str]:
     Returns:
         "F", "M", "CONFLICT", ou None
     """
-    exclusive_female = []
-    exclusive_male = []
+    selected = frozenset(selected_modules)
+    has_female = not selected.isdisjoint(EXCLUSIVE_FEMALE)
+    has_male = not selected.isdisjoint(EXCLUSIVE_MALE)
 
-    for module in selected_modules:
-        if module in GENDER_DISTRIBUTION:
-            pct_f, pct_m = GENDER_DISTRIBUTION[module]
-            if pct_f == 1.0:
-                exclusive_female.append(module)
-            elif pct_m == 1.0:
-                exclusive_male.append(module)
-
-    if exclusive_female and exclusive_male:
+    if has_female and has_male:
         # Conflit ! Impossible d'avoir grossesse + cancer prostate
         return "CONFLICT"
-    elif exclusive_female:
+    if has_female:
         return "F"
-    elif exclusive_male:
+    if has_male:
         return "M"
-
     return None  # Pas de contrainte stricte
 
 
@@ -277,58 +308,122 @@ class GenerationResult:
     log_output: str = ""
 
 
+@functools.lru_cache(maxsize=None)
 def get_module_label(module_name: str) -> str:
     """Retourne le label français d'un module"""
     return MODULE_LABELS_FR.get(module_name, module_name.replace("_", " ").title())
 
 
+# Fiches de repli préconstruites à l'import pour les modules catalogués
+# dans PATHOLOGY_CATEGORIES mais absents du dossier modules/ : plus de
+# dict ni de label reconstruits à chaque miss
+_FALLBACK_INFO = {
+    name: {
+        'module_id': name,
+        'name': name,
+        'label_fr': get_module_label(name),
+        'description': '',
+        'has_prevalence': False,
+        'states_count': 0,
+    }
+    for names in PATHOLOGY_CATEGORIES.values() for name in names
+}
+
+
+# Cache de get_all_modules, invalidé par la signature (nom, mtime_ns)
+# du dossier: un ajout, une suppression ou une édition de module force
+# un rechargement, sinon appels répétés = lookup pur
+_MODULES_CACHE: Dict[str, Dict] = {}
+_MODULES_CACHE_SIG: tuple = ()
+
+
 def get_all_modules() -> Dict[str, Dict]:
     """
     Charge tous les modules Synthea disponibles.
     Retourne un dict {nom_module: info_module}
+
+    Mémoïsé sur la signature mtime du dossier (voir _MODULES_CACHE) ;
+    les infos par module restent de toute façon invalidées
+    individuellement via le mtime dans get_module_info.
     """
-    modules = {}
+    global _MODULES_CACHE, _MODULES_CACHE_SIG
 
     if not SYNTHEA_MODULES_PATH.exists():
-        return modules
+        return {}
 
-    for json_file in SYNTHEA_MODULES_PATH.glob("*.json"):
-        try:
-            info = get_module_info(json_file)
-            if info:
-                modules[json_file.stem] = info
-        except Exception:
-            continue
+    json_files = sorted(SYNTHEA_MODULES_PATH.glob("*.json"))
+    sig = tuple((p.name, p.stat().st_mtime_ns) for p in json_files)
+    if sig == _MODULES_CACHE_SIG and _MODULES_CACHE:
+        return _MODULES_CACHE
 
+    modules = {}
+    if json_files:
+        # Fichiers indépendants: parsing en parallèle (orjson relâche le
+        # GIL dans son code C), l'ordre est préservé par executor.map
+        max_workers = min(16, (os.cpu_count() or 4) * 2)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for json_file, info in zip(json_files, executor.map(get_module_info, json_files)):
+                if info:
+                    modules[json_file.stem] = info
+
+    _MODULES_CACHE = modules
+    _MODULES_CACHE_SIG = sig
     return modules
 
 
+def _state_has_distribution(state: dict) -> bool:
+    """Vrai si l'état porte des transitions probabilistes (prévalence)."""
+    if 'distributed_transition' in state:
+        return True
+    branches = state.get('complex_transition')
+    if not branches:
+        # Cas majoritaire: pas de générateur à instancier
+        return False
+    return any(isinstance(b, dict) and 'distributions' in b for b in branches)
+
+
 def get_module_info(module_path: Path) -> Optional[Dict]:
     """
     Extrait les métadonnées d'un module Synthea.
+
+    Le cache est indexé sur (chemin, mtime) : une édition du fichier
+    invalide naturellement l'entrée correspondante.
     """
     try:
-        with open(module_path, 'r', encoding='utf-8') as f:
-            module = json.load(f)
+        mtime = os.path.getmtime(module_path)
+    except OSError:
+        return None
+    return _get_module_info_cached(str(module_path), mtime)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_module_info_cached(module_path: str, mtime: float) -> Optional[Dict]:
+    try:
+        module = _json_loads_bytes(Path(module_path).read_bytes())
 
         # Extraire les remarques (documentation)
         remarks = module.get('remarks', [])
         description = remarks[0] if remarks else ""
 
-        # Vérifier si le module a des probabilités de prévalence
+        # Vérifier si le module a des probabilités de prévalence:
+        # inspection structurelle des clés (lookups O(1)) avec sortie
+        # dès le premier état probabiliste — inutile de balayer les
+        # centaines d'états restants des gros modules
         states = module.get('states', {})
-        has_prevalence = any(
-            'distributed_transition' in str(state) or 'distribution' in str(state)
-            for state in states.values()
-        )
+        has_prevalence = False
+        for state in states.values():
+            if isinstance(state, dict) and _state_has_distribution(state):
+                has_prevalence = True
+                break
 
+        stem = Path(module_path).stem
         return {
-            'name': module.get('name', module_path.stem),
-            'file': module_path.name,
+            'name': module.get('name', stem),
+            'file': os.path.basename(module_path),
             'description': description[:200] if description else "",
             'has_prevalence': has_prevalence,
             'states_count': len(states),
-            'label_fr': get_module_label(module_path.stem)
+            'label_fr': get_module_label(stem)
         }
     except Exception:
         return None
@@ -337,31 +432,53 @@ def get_module_info(module_path: Path) -> Optional[Dict]:
 def get_modules_by_category() -> Dict[str, List[Dict]]:
     """
     Retourne les modules groupés par catégorie avec leurs infos.
+
+    Reconstruit à chaque appel depuis le cache de get_all_modules (la
+    catégorisation est triviale une fois les modules en cache, et suit
+    ainsi ses invalidations) ; les fiches mises en cache ne sont plus
+    mutées, chaque entrée est une copie portant son module_id.
     """
     all_modules = get_all_modules()
     categorized = {}
 
     for category, module_names in PATHOLOGY_CATEGORIES.items():
-        categorized[category] = []
+        entries = categorized[category] = []
         for name in module_names:
-            if name in all_modules:
-                info = all_modules[name]
-                info['module_id'] = name
-                categorized[category].append(info)
+            info = all_modules.get(name)
+            if info is not None:
+                entries.append({**info, 'module_id': name})
             else:
-                # Module non trouvé mais dans la catégorie
-                categorized[category].append({
-                    'module_id': name,
-                    'name': name,
-                    'label_fr': get_module_label(name),
-                    'description': '',
-                    'has_prevalence': False,
-                    'states_count': 0
-                })
+                # Module non trouvé mais dans la catégorie: fiche de repli
+                entries.append(_FALLBACK_INFO[name])
 
     return categorized
 
 
+@functools.lru_cache(maxsize=1)
+def _check_java() -> Optional[str]:
+    """
+    Vérifie l'installation Java (une seule fois par process).
+
+    Lancer une JVM pour 'java -version' coûte plusieurs centaines de ms ;
+    Java ne se désinstalle pas en cours de route, le résultat est mémoïsé.
+    Retourne un message d'erreur, ou None si tout va bien.
+    """
+    try:
+        result = subprocess.run(
+            ["java", "-version"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        if result.returncode != 0:
+            return "Java n'est pas correctement installé"
+    except FileNotFoundError:
+        return "Java n'est pas installé. Installez Java 11 ou supérieur."
+    except subprocess.TimeoutExpired:
+        return "Timeout lors de la vérification de Java"
+    return None
+
+
 def validate_environment() -> List[str]:
     """
     Valide que l'environnement est prêt pour la génération.
@@ -375,20 +492,10 @@ def validate_environment() -> List[str]:
             f"JAR Synthea non trouvé. Exécutez './gradlew build' dans {SYNTHEA_PROJECT_PATH}"
         )
 
-    # Vérifier Java
-    try:
-        result = subprocess.run(
-            ["java", "-version"],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        if result.returncode != 0:
-            errors.append("Java n'est pas correctement installé")
-    except FileNotFoundError:
-        errors.append("Java n'est pas installé. Installez Java 11 ou supérieur.")
-    except subprocess.TimeoutExpired:
-        errors.append("Timeout lors de la vérification de Java")
+    # Vérifier Java (résultat mémoïsé)
+    java_error = _check_java()
+    if java_error:
+        errors.append(java_error)
 
     # Vérifier le dossier de sortie
     try:
@@ -403,25 +510,42 @@ def clear_output_directory() -> int:
     """
     Supprime les fichiers FHIR existants.
     Retourne le nombre de fichiers supprimés.
+
+    Le répertoire est renommé d'un seul coup puis détruit par un thread
+    d'arrière-plan : un rename au lieu d'un unlink (et son écriture de
+    métadonnées) par fichier, la génération ne bloque plus dessus.
     """
-    count = 0
-    if FHIR_OUTPUT_PATH.exists():
-        for f in FHIR_OUTPUT_PATH.glob("*.json"):
-            try:
-                f.unlink()
-                count += 1
-            except Exception:
-                pass
+    if not FHIR_OUTPUT_PATH.exists():
+        return 0
+
+    with os.scandir(FHIR_OUTPUT_PATH) as it:
+        count = sum(1 for e in it if e.name.endswith('.json'))
+
+    old_dir = FHIR_OUTPUT_PATH.with_name(f"fhir.old.{os.getpid()}.{time.time_ns()}")
+    try:
+        FHIR_OUTPUT_PATH.rename(old_dir)
+    except OSError:
+        # Repli: suppression synchrone si le rename échoue
+        shutil.rmtree(FHIR_OUTPUT_PATH, ignore_errors=True)
+    else:
+        threading.Thread(target=shutil.rmtree, args=(old_dir,),
+                         kwargs={'ignore_errors': True}, daemon=True).start()
+
+    FHIR_OUTPUT_PATH.mkdir(parents=True, exist_ok=True)
     return count
 
 
 def count_generated_patients() -> int:
     """
     Compte le nombre de patients générés dans le dossier de sortie.
+
+    os.scandir + compteur: pas de liste de Path matérialisée juste pour
+    un len() sur les grosses cohortes.
     """
     if not FHIR_OUTPUT_PATH.exists():
         return 0
-    return len(list(FHIR_OUTPUT_PATH.glob("*.json")))
+    with os.scandir(FHIR_OUTPUT_PATH) as it:
+        return sum(1 for e in it if e.name.endswith('.json') and e.is_file())
 
 
 # =============================================================================
@@ -442,13 +566,19 @@ def adjust_distribution(distributions: list, target: float) -> bool:
     condition_transition = None
     terminal_transition = None
 
+    # Une seule passe avec sortie anticipée dès que les deux transitions
+    # sont capturées ; le test exact "Terminal" (cas nominal des modules)
+    # évite l'allocation .lower() sur la quasi-totalité des entrées
     for dist in distributions:
-        transition_name = dist.get("transition", "").lower()
-        if transition_name == "terminal":
+        transition = dist.get("transition")
+        if transition and (transition == "Terminal"
+                           or transition.lower() == "terminal"):
             terminal_transition = dist
         elif condition_transition is None:
             # Prendre la première transition non-Terminal comme condition
             condition_transition = dist
+        if condition_transition is not None and terminal_transition is not None:
+            break
 
     if condition_transition and terminal_transition:
         condition_transition["distribution"] = target
@@ -488,34 +618,61 @@ def modify_prevalence_transitions(module_data: dict, target: float) -> int:
     return modifications
 
 
-def create_modified_module(module_name: str, target_prevalence: float) -> Optional[Path]:
+_MODULE_PATH_INDEX: Dict[str, Path] = {}
+_MODULE_PATH_INDEX_MTIME: Optional[int] = None
+
+
+def _find_module_path(module_name: str) -> Optional[Path]:
+    """
+    Localise {module_name}.json sous SYNTHEA_MODULES_PATH.
+
+    Le cas courant (module à la racine) reste un simple test d'existence;
+    pour les sous-dossiers, un index {stem: chemin} est construit une fois
+    par rglob et invalidé sur le mtime du répertoire des modules, au lieu
+    de re-parcourir chaque sous-dossier à chaque appel.
+    """
+    global _MODULE_PATH_INDEX, _MODULE_PATH_INDEX_MTIME
+
+    direct = SYNTHEA_MODULES_PATH / f"{module_name}.json"
+    if direct.exists():
+        return direct
+
+    try:
+        mtime = SYNTHEA_MODULES_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+    if mtime != _MODULE_PATH_INDEX_MTIME:
+        _MODULE_PATH_INDEX = {
+            p.stem: p for p in SYNTHEA_MODULES_PATH.rglob("*.json")
+        }
+        _MODULE_PATH_INDEX_MTIME = mtime
+
+    return _MODULE_PATH_INDEX.get(module_name)
+
+
+def create_modified_module(module_name: str, target_prevalence: float) -> Optional[Tuple[Path, bytes]]:
     """
-    Crée une copie modifiée du module avec la prévalence cible.
+    Modifie le module en place avec la prévalence cible.
 
     Args:
         module_name: Nom du module (sans .json)
         target_prevalence: Prévalence cible (0.0 à 1.0, ex: 1.0 = 100%)
 
     Returns:
-        Chemin vers le module modifié, ou None si échec
+        (chemin du module, octets originaux) pour la restauration,
+        ou None si échec / rien à modifier
     """
-    original_path = SYNTHEA_MODULES_PATH / f"{module_name}.json"
-
-    if not original_path.exists():
-        # Chercher dans les sous-dossiers
-        for subdir in SYNTHEA_MODULES_PATH.iterdir():
-            if subdir.is_dir():
-                candidate = subdir / f"{module_name}.json"
-                if candidate.exists():
-                    original_path = candidate
-                    break
-
-    if not original_path.exists():
+    original_path = _find_module_path(module_name)
+    if original_path is None:
         return None
 
     try:
-        with open(original_path, 'r', encoding='utf-8') as f:
-            module_data = json.load(f)
+        # Les octets originaux servent de sauvegarde en mémoire:
+        # pas de copie .backup sur disque (une lecture au lieu de
+        # lecture + copie)
+        original_bytes = original_path.read_bytes()
+        module_data = _json_loads_bytes(original_bytes)
 
         # Modifier les transitions de prévalence
         modifications = modify_prevalence_transitions(module_data, target_prevalence)
@@ -523,59 +680,51 @@ def create_modified_module(module_name: str, target_prevalence: float) -> Option
         if modifications == 0:
             return None  # Pas de transitions à modifier
 
-        # Sauvegarder dans le même emplacement (remplace temporairement)
-        # Note: On sauvegarde une backup avant
-        backup_path = original_path.with_suffix('.json.backup')
-        shutil.copy2(original_path, backup_path)
+        # Écriture compacte (Synthea n'a pas besoin du pretty-print,
+        # et orjson sérialise en C quand il est là), via un fichier
+        # temporaire + os.replace: le module n'est jamais à moitié écrit
+        # même si le process meurt en cours de route
+        if orjson is not None:
+            payload = orjson.dumps(module_data)
+        else:
+            payload = json.dumps(module_data, ensure_ascii=False).encode('utf-8')
+        tmp_path = original_path.with_suffix('.json.tmp')
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, original_path)
 
-        with open(original_path, 'w', encoding='utf-8') as f:
-            json.dump(module_data, f, indent=2, ensure_ascii=False)
-
-        return backup_path  # Retourne le chemin de la backup pour restauration
+        return (original_path, original_bytes)
 
     except Exception as e:
         print(f"Erreur modification module {module_name}: {e}")
         return None
 
 
-def restore_modified_modules(backup_paths: List[Path]) -> None:
+def restore_modified_modules(backups: List[Tuple[Path, bytes]]) -> None:
     """
-    Restaure les modules originaux depuis les backups.
+    Restaure les modules originaux depuis les sauvegardes en mémoire.
 
     Args:
-        backup_paths: Liste des chemins de backup à restaurer
+        backups: Liste de (chemin du module, octets originaux)
     """
-    for backup_path in backup_paths:
-        if backup_path and backup_path.exists():
-            try:
-                original_path = backup_path.with_suffix('')  # Enlève .backup
-                shutil.move(str(backup_path), str(original_path))
-            except Exception as e:
-                print(f"Erreur restauration {backup_path}: {e}")
+    for original_path, original_bytes in backups:
+        try:
+            # Restauration atomique, comme l'écriture modifiée
+            tmp_path = original_path.with_suffix('.json.tmp')
+            tmp_path.write_bytes(original_bytes)
+            os.replace(tmp_path, original_path)
+        except Exception as e:
+            print(f"Erreur restauration {original_path}: {e}")
 
 
-def build_synthea_command(
-    config: GeneratorConfig,
-    region: Optional[str] = None,
-    batch_size: Optional[int] = None,
-    batch_seed: Optional[int] = None
-) -> List[str]:
+def _build_base_cmd(config: GeneratorConfig) -> Tuple[str, ...]:
     """
-    Construit la commande pour exécuter Synthea.
+    Arguments invariants d'un run Synthea (jar, filtres, options d'export).
 
-    Args:
-        config: Configuration de base
-        region: Région spécifique (si None, Synthea utilise la première du fichier)
-        batch_size: Nombre de patients pour ce batch (remplace config.population_size)
-        batch_seed: Seed pour ce batch (remplace config.seed)
+    Construits une seule fois par génération puis partagés entre batchs :
+    seuls la taille, le seed, le répertoire de sortie et la région
+    varient d'un batch à l'autre.
     """
-    pop_size = batch_size if batch_size is not None else config.population_size
-
-    cmd = [
-        "java", "-jar",
-        str(SYNTHEA_JAR_PATH),
-        "-p", str(pop_size),
-    ]
+    cmd = ["java", "-jar", str(SYNTHEA_JAR_PATH)]
 
     # Filtre par genre
     if config.gender:
@@ -584,11 +733,6 @@ def build_synthea_command(
     # Tranche d'âge
     cmd.extend(["-a", f"{config.age_min}-{config.age_max}"])
 
-    # Seed pour reproductibilité (utiliser batch_seed si fourni)
-    seed = batch_seed if batch_seed is not None else config.seed
-    if seed is not None:
-        cmd.extend(["-s", str(seed)])
-
     # Date de référence
     if config.reference_date:
         cmd.extend(["-r", config.reference_date.replace("-", "")])
@@ -604,6 +748,46 @@ def build_synthea_command(
     if config.only_alive:
         cmd.append("--generate.only_alive_patients=true")
 
+    return tuple(cmd)
+
+
+def build_synthea_command(
+    config: GeneratorConfig,
+    region: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    batch_seed: Optional[int] = None,
+    output_dir: Optional[Path] = None,
+    base_cmd: Optional[Tuple[str, ...]] = None
+) -> List[str]:
+    """
+    Construit la commande pour exécuter Synthea.
+
+    Args:
+        config: Configuration de base
+        region: Région spécifique (si None, Synthea utilise la première du fichier)
+        batch_size: Nombre de patients pour ce batch (remplace config.population_size)
+        batch_seed: Seed pour ce batch (remplace config.seed)
+        output_dir: Répertoire de sortie dédié (pour isoler les batchs parallèles)
+        base_cmd: Socle invariant préconstruit (_build_base_cmd), recalculé sinon
+    """
+    if base_cmd is None:
+        base_cmd = _build_base_cmd(config)
+
+    cmd = list(base_cmd)
+
+    pop_size = batch_size if batch_size is not None else config.population_size
+    cmd.extend(["-p", str(pop_size)])
+
+    # Seed pour reproductibilité (utiliser batch_seed si fourni)
+    seed = batch_seed if batch_seed is not None else config.seed
+    if seed is not None:
+        cmd.extend(["-s", str(seed)])
+
+    # Sortie isolée par batch (les batchs parallèles ne partagent pas
+    # leur répertoire d'export; fusion en fin de génération)
+    if output_dir is not None:
+        cmd.append(f"--exporter.baseDirectory={output_dir}")
+
     # Ajouter la région comme argument positionnel (à la fin)
     if region:
         cmd.append(region)
@@ -611,6 +795,23 @@ def build_synthea_command(
     return cmd
 
 
+# Regex de progression Synthea précompilées, appliquées au flux d'octets
+# brut: pas de décodage UTF-8 ni de lookup du cache re par ligne de log
+_SYNTHEA_ENV: Optional[Dict[str, str]] = None
+
+
+def _get_synthea_env() -> Dict[str, str]:
+    """Environnement des sous-processus Synthea, construit une seule fois."""
+    global _SYNTHEA_ENV
+    if _SYNTHEA_ENV is None:
+        _SYNTHEA_ENV = {**os.environ, 'JAVA_TOOL_OPTIONS': '-Dfile.encoding=UTF-8'}
+    return _SYNTHEA_ENV
+
+
+_RECORDS_RE = re.compile(rb'Records:\s*(\d+)')
+_INT_RE = re.compile(rb'(\d+)')
+
+
 def _run_single_batch(
     config: GeneratorConfig,
     region: str,
@@ -618,44 +819,80 @@ def _run_single_batch(
     batch_seed: Optional[int],
     progress_base: float,
     progress_range: float,
-    progress_callback: Optional[Callable[[str, float], None]] = None
-) -> Tuple[bool, int, List[str]]:
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    output_dir: Optional[Path] = None,
+    base_cmd: Optional[Tuple[str, ...]] = None,
+    env: Optional[Dict[str, str]] = None
+) -> Tuple[bool, int, str]:
     """
     Exécute une génération Synthea pour une région spécifique.
-    Retourne (success, patients_generated, log_lines)
+    Retourne (success, patients_generated, log_output)
+
+    Le stdout est lu en binaire par blocs de 64 Kio (read1) plutôt que
+    ligne à ligne: un syscall par bloc au lieu d'un par ligne, seules les
+    lignes de progression sont analysées (en bytes), et le log complet
+    n'est décodé qu'une seule fois à la fin.
     """
-    cmd = build_synthea_command(config, region=region, batch_size=batch_size, batch_seed=batch_seed)
+    cmd = build_synthea_command(config, region=region, batch_size=batch_size,
+                                batch_seed=batch_seed, output_dir=output_dir,
+                                base_cmd=base_cmd)
 
-    process = subprocess.Popen(
-        cmd,
-        cwd=str(SYNTHEA_PROJECT_PATH),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-        env={**os.environ, 'JAVA_TOOL_OPTIONS': '-Dfile.encoding=UTF-8'}
-    )
+    if env is None:
+        env = _get_synthea_env()
 
-    log_lines = []
-    patients_generated = 0
+    try:
+        process = subprocess.Popen(
+            cmd,
+            cwd=str(SYNTHEA_PROJECT_PATH),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=1 << 20,
+            env=env
+        )
+    except OSError:
+        # Java a pu disparaître depuis la dernière vérification:
+        # invalider le cache pour que validate_environment re-teste
+        _check_java.cache_clear()
+        raise
 
-    for line in process.stdout:
-        log_lines.append(line)
+    log_chunks = []
+    patients_generated = 0
+    buf = b""
+    read1 = process.stdout.read1
 
-        if "Records:" in line:
-            match = re.search(r'Records:\s*(\d+)', line)
+    def _scan_line(line: bytes) -> None:
+        nonlocal patients_generated
+        if b"Records:" in line:
+            match = _RECORDS_RE.search(line)
             if match:
                 patients_generated = int(match.group(1))
 
-        elif "Running" in line and progress_callback:
-            match = re.search(r'(\d+)', line)
+        elif progress_callback and b"Running" in line:
+            match = _INT_RE.search(line)
             if match:
                 current = int(match.group(1))
                 progress = progress_base + (current / batch_size * progress_range * 0.8)
                 progress_callback(f"{region}: {current}/{batch_size}...", progress)
 
+    while True:
+        chunk = read1(65536)
+        if not chunk:
+            break
+        log_chunks.append(chunk)
+        buf += chunk
+        if b"\n" not in buf:
+            continue
+        # Seul le parsing de progression a besoin de la granularité ligne
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            _scan_line(line)
+
+    if buf:
+        _scan_line(buf)
+
     process.wait()
-    return process.returncode == 0, patients_generated, log_lines
+    log_output = b"".join(log_chunks).decode('utf-8', 'replace')
+    return process.returncode == 0, patients_generated, log_output
 
 
 def run_synthea_generation(
@@ -674,7 +911,7 @@ def run_synthea_generation(
         GenerationResult avec les détails de l'exécution
     """
     start_time = time.time()
-    backup_paths = []  # Pour restaurer les modules modifiés
+    module_backups = []  # (chemin, octets originaux) pour restauration
 
     # Valider l'environnement
     env_errors = validate_environment()
@@ -714,9 +951,9 @@ def run_synthea_generation(
         for module_name, prevalence_pct in config.custom_prevalence.items():
             # Convertir pourcentage (0-100) en proportion (0.0-1.0)
             target_prevalence = prevalence_pct / 100.0
-            backup_path = create_modified_module(module_name, target_prevalence)
-            if backup_path:
-                backup_paths.append(backup_path)
+            backup = create_modified_module(module_name, target_prevalence)
+            if backup:
+                module_backups.append(backup)
 
     try:
         # Nettoyer le dossier de sortie si demandé
@@ -746,44 +983,109 @@ def run_synthea_generation(
                 region_list += f"... ({len(distribution)} régions)"
             progress_callback(f"Génération: {region_list}", 0.1)
 
-        # Générer par batch (une région à la fois)
-        for batch_idx, (region, batch_size) in enumerate(distribution):
-            progress_base = 0.1 + (batch_idx * progress_per_batch)
-
-            if progress_callback:
-                progress_callback(
-                    f"Région {batch_idx + 1}/{num_batches}: {region} ({batch_size} patients)...",
-                    progress_base
+        # Générer les batchs régionaux en parallèle: chaque batch est une
+        # JVM indépendante, les threads ne font qu'attendre le subprocess.
+        # Les threads du pool n'appellent jamais progress_callback
+        # directement (Streamlit exige le thread de script): ils déposent
+        # leurs mises à jour dans une file, drainée par le thread appelant
+        # pendant l'attente des futures.
+        progress_queue: queue.Queue = queue.Queue()
+
+        def queued_progress(message: str, progress: float) -> None:
+            progress_queue.put((message, progress))
+
+        def drain_progress() -> None:
+            while True:
+                try:
+                    message, progress = progress_queue.get_nowait()
+                except queue.Empty:
+                    return
+                progress_callback(message, progress)
+
+        batch_progress = queued_progress if progress_callback else None
+        max_workers = min(max(1, (os.cpu_count() or 2) // 2), num_batches)
+
+        # Socle de commande et environnement invariants, construits une
+        # fois pour tous les batchs (plus de copie d'os.environ par JVM)
+        base_cmd = _build_base_cmd(config)
+        batch_env = _get_synthea_env()
+
+        batch_dirs = []
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch_idx, (region, batch_size) in enumerate(distribution):
+                # Calculer un seed différent pour chaque batch si seed est défini
+                batch_seed = None
+                if config.seed is not None:
+                    batch_seed = config.seed + batch_idx * 1000
+
+                # Répertoire de sortie isolé: pas d'écritures croisées
+                # entre JVM, fusion après coup
+                batch_dir = FHIR_OUTPUT_PATH.parent / f"batch_{batch_idx}"
+                batch_dirs.append(batch_dir)
+
+                future = executor.submit(
+                    _run_single_batch,
+                    config=config,
+                    region=region,
+                    batch_size=batch_size,
+                    batch_seed=batch_seed,
+                    progress_base=0.1 + (batch_idx * progress_per_batch),
+                    progress_range=progress_per_batch,
+                    progress_callback=batch_progress,
+                    output_dir=batch_dir,
+                    base_cmd=base_cmd,
+                    env=batch_env
                 )
-
-            # Calculer un seed différent pour chaque batch si seed est défini
-            batch_seed = None
-            if config.seed is not None:
-                batch_seed = config.seed + batch_idx * 1000
-
-            success, generated, logs = _run_single_batch(
-                config=config,
-                region=region,
-                batch_size=batch_size,
-                batch_seed=batch_seed,
-                progress_base=progress_base,
-                progress_range=progress_per_batch,
-                progress_callback=progress_callback
-            )
-
-            total_patients += generated
-            all_logs.extend(logs)
-            all_logs.append(f"\n--- Fin batch {region}: {generated} patients ---\n")
-
-            if not success:
-                batch_errors.append(f"{region}: échec de génération")
+                futures[future] = region
+
+            completed = 0
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2)
+
+                if progress_callback:
+                    drain_progress()
+
+                for future in done:
+                    region = futures[future]
+                    success, generated, logs = future.result()
+
+                    completed += 1
+                    total_patients += generated
+                    all_logs.append(logs)
+                    all_logs.append(f"\n--- Fin batch {region}: {generated} patients ---\n")
+
+                    if not success:
+                        batch_errors.append(f"{region}: échec de génération")
+
+                    if progress_callback:
+                        progress_callback(
+                            f"Batchs terminés: {completed}/{num_batches}",
+                            0.1 + completed * progress_per_batch
+                        )
+
+        # Fusionner les sorties de batch dans le répertoire FHIR final,
+        # en comptant les fichiers au passage
+        merged_count = 0
+        for batch_dir in batch_dirs:
+            batch_fhir = batch_dir / "fhir"
+            if batch_fhir.exists():
+                for f in batch_fhir.glob("*.json"):
+                    shutil.move(str(f), str(FHIR_OUTPUT_PATH / f.name))
+                    merged_count += 1
+            shutil.rmtree(batch_dir, ignore_errors=True)
 
         execution_time = time.time() - start_time
 
-        # Compter les patients réellement générés
-        actual_count = count_generated_patients()
-        if actual_count > 0:
-            total_patients = actual_count
+        # Le comptage incrémental de la fusion fait foi; le re-scan du
+        # répertoire complet n'est qu'un repli si rien n'a été fusionné
+        if merged_count > 0:
+            total_patients = merged_count
+        else:
+            actual_count = count_generated_patients()
+            if actual_count > 0:
+                total_patients = actual_count
 
         if progress_callback:
             progress_callback("Terminé!", 1.0)
@@ -829,8 +1131,8 @@ def run_synthea_generation(
 
     finally:
         # 3. RESTAURATION DES MODULES MODIFIÉS
-        if backup_paths:
-            restore_modified_modules(backup_paths)
+        if module_backups:
+            restore_modified_modules(module_backups)
 
 
 def estimate_generation_time(population_size: int) -> str:
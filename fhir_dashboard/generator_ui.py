@@ -31,6 +31,40 @@ MODULES_WITHOUT_PREVALENCE_SUPPORT = {
 }
 
 
+@st.cache_data(show_spinner=False)
+def _cached_all_modules() -> Dict:
+    """Catalogue des modules, mémoïsé entre deux reruns Streamlit."""
+    return get_all_modules()
+
+
+@st.cache_data(show_spinner=False)
+def _cached_modules_by_category() -> Dict:
+    """Modules groupés par catégorie, mémoïsés entre deux reruns."""
+    return get_modules_by_category()
+
+
+@st.cache_data(show_spinner=False)
+def _build_search_index() -> List[Dict]:
+    """
+    Index de recherche précalculé: id, label, description et une chaîne
+    de recherche déjà passée en minuscules. Construit une fois par
+    session, chaque frappe ne fait plus qu'un test de sous-chaîne par
+    module au lieu de trois .lower() et un get_module_label.
+    """
+    index = []
+    for module_id, info in _cached_all_modules().items():
+        label_fr = get_module_label(module_id)
+        description = info.get('description', '')
+        index.append({
+            'id': module_id,
+            'label': label_fr,
+            'description': description,
+            'states': info.get('states_count', 0),
+            'haystack': f"{module_id}\0{label_fr}\0{description}".lower(),
+        })
+    return index
+
+
 def render_generator_tab():
     """Point d'entrée principal pour l'onglet Générateur"""
     st.header("🧬 Générateur de Cohorte Synthétique")
@@ -56,9 +90,9 @@ def render_generator_tab():
     if "generator_config" not in st.session_state:
         st.session_state.generator_config = GeneratorConfig()
     if "selected_categories" not in st.session_state:
-        st.session_state.selected_categories = []
+        st.session_state.selected_categories = set()
     if "selected_modules" not in st.session_state:
-        st.session_state.selected_modules = []
+        st.session_state.selected_modules = set()
     if "custom_prevalence" not in st.session_state:
         st.session_state.custom_prevalence = {}
     if "generation_result" not in st.session_state:
@@ -298,13 +332,21 @@ def render_advanced_tab():
     )
 
 
+@st.fragment
 def render_pathology_selector_basic():
     """Sélecteur de pathologies par catégorie (version basique)"""
 
+    # Cocher une catégorie ne rerun que ce fragment; on ne remonte au
+    # script complet que si la sélection a réellement changé (résumé,
+    # auto-détection de genre et bouton de génération sont hors fragment)
+    before_selection = set(st.session_state.selected_modules)
+
     # Afficher les catégories en colonnes
     cols = st.columns(3)
 
     categories = list(PATHOLOGY_CATEGORIES.keys())
+    selected_categories = st.session_state.selected_categories
+    selected_modules = st.session_state.selected_modules
 
     for i, category in enumerate(categories):
         col_idx = i % 3
@@ -317,29 +359,31 @@ def render_pathology_selector_basic():
             )
 
             if is_selected:
-                if category not in st.session_state.selected_categories:
-                    st.session_state.selected_categories.append(category)
+                if category not in selected_categories:
+                    selected_categories.add(category)
                     # Ajouter tous les modules de la catégorie
-                    for module in PATHOLOGY_CATEGORIES[category]:
-                        if module not in st.session_state.selected_modules:
-                            st.session_state.selected_modules.append(module)
+                    selected_modules.update(PATHOLOGY_CATEGORIES[category])
             else:
-                if category in st.session_state.selected_categories:
-                    st.session_state.selected_categories.remove(category)
+                if category in selected_categories:
+                    selected_categories.remove(category)
                     # Retirer les modules de la catégorie
-                    for module in PATHOLOGY_CATEGORIES[category]:
-                        if module in st.session_state.selected_modules:
-                            st.session_state.selected_modules.remove(module)
+                    selected_modules.difference_update(PATHOLOGY_CATEGORIES[category])
 
     # Résumé de la sélection
     if st.session_state.selected_modules:
         st.info(f"📋 **{len(st.session_state.selected_modules)}** pathologies sélectionnées")
 
+    if st.session_state.selected_modules != before_selection:
+        st.rerun(scope="app")
+
 
+@st.fragment
 def render_pathology_search():
     """Recherche libre de pathologies"""
 
-    all_modules = get_all_modules()
+    # La frappe dans le champ ne rerun que ce fragment; seul un vrai
+    # changement de sélection déclenche le rerun complet
+    before_selection = set(st.session_state.selected_modules)
 
     # Champ de recherche
     search_query = st.text_input(
@@ -349,41 +393,30 @@ def render_pathology_search():
     )
 
     if search_query:
-        # Filtrer les modules
+        # Filtrer sur l'index précalculé (nom, label français, description)
         query_lower = search_query.lower()
-        matching_modules = []
-
-        for module_id, info in all_modules.items():
-            label_fr = get_module_label(module_id)
-            # Rechercher dans le nom, le label français et la description
-            if (query_lower in module_id.lower() or
-                query_lower in label_fr.lower() or
-                query_lower in info.get('description', '').lower()):
-                matching_modules.append({
-                    'id': module_id,
-                    'label': label_fr,
-                    'description': info.get('description', ''),
-                    'states': info.get('states_count', 0)
-                })
+        matching_modules = [
+            module for module in _build_search_index()
+            if query_lower in module['haystack']
+        ]
 
         if matching_modules:
             st.caption(f"**{len(matching_modules)}** résultat(s) trouvé(s)")
 
             # Afficher les résultats
+            selected_modules = st.session_state.selected_modules
             for module in matching_modules[:20]:  # Limiter à 20 résultats
                 col1, col2 = st.columns([4, 1])
                 with col1:
-                    is_selected = module['id'] in st.session_state.selected_modules
+                    is_selected = module['id'] in selected_modules
                     if st.checkbox(
                         f"**{module['label']}** (`{module['id']}`)",
                         value=is_selected,
                         key=f"search_{module['id']}"
                     ):
-                        if module['id'] not in st.session_state.selected_modules:
-                            st.session_state.selected_modules.append(module['id'])
+                        selected_modules.add(module['id'])
                     else:
-                        if module['id'] in st.session_state.selected_modules:
-                            st.session_state.selected_modules.remove(module['id'])
+                        selected_modules.discard(module['id'])
 
                 with col2:
                     if module['description']:
@@ -391,11 +424,17 @@ def render_pathology_search():
         else:
             st.warning(f"Aucune pathologie trouvée pour '{search_query}'")
 
+    if st.session_state.selected_modules != before_selection:
+        st.rerun(scope="app")
 
+
+@st.fragment
 def render_pathology_selector_advanced():
     """Sélecteur de pathologies avec détails (version avancée)"""
 
-    modules_by_category = get_modules_by_category()
+    before_selection = set(st.session_state.selected_modules)
+    modules_by_category = _cached_modules_by_category()
+    selected_modules = st.session_state.selected_modules
 
     for category, modules in modules_by_category.items():
         with st.expander(f"**{category}** ({len(modules)} pathologies)"):
@@ -406,18 +445,16 @@ def render_pathology_selector_advanced():
                 col1, col2 = st.columns([3, 2])
 
                 with col1:
-                    is_selected = module_id in st.session_state.selected_modules
+                    is_selected = module_id in selected_modules
                     if st.checkbox(
                         f"{label_fr}",
                         value=is_selected,
                         key=f"adv_{module_id}",
                         help=f"Module: {module_id}"
                     ):
-                        if module_id not in st.session_state.selected_modules:
-                            st.session_state.selected_modules.append(module_id)
+                        selected_modules.add(module_id)
                     else:
-                        if module_id in st.session_state.selected_modules:
-                            st.session_state.selected_modules.remove(module_id)
+                        selected_modules.discard(module_id)
 
                 with col2:
                     desc = module.get('description', '')
@@ -430,12 +467,16 @@ def render_pathology_selector_advanced():
 
         # Bouton pour tout désélectionner
         if st.button("🗑️ Tout désélectionner"):
-            st.session_state.selected_modules = []
-            st.session_state.selected_categories = []
+            st.session_state.selected_modules = set()
+            st.session_state.selected_categories = set()
             st.session_state.custom_prevalence = {}
-            st.rerun()
+            st.rerun(scope="app")
+
+    if st.session_state.selected_modules != before_selection:
+        st.rerun(scope="app")
 
 
+@st.fragment
 def render_prevalence_editor():
     """Éditeur de prévalence pour les pathologies sélectionnées"""
 
@@ -444,7 +485,7 @@ def render_prevalence_editor():
         return
 
     # Vérifier si des modules ne supportent pas la prévalence
-    unsupported = [m for m in st.session_state.selected_modules if m in MODULES_WITHOUT_PREVALENCE_SUPPORT]
+    unsupported = [m for m in sorted(st.session_state.selected_modules) if m in MODULES_WITHOUT_PREVALENCE_SUPPORT]
     if unsupported:
         st.warning(f"""
         ⚠️ **Certaines pathologies ne supportent pas la modification de prévalence:**
@@ -459,7 +500,7 @@ def render_prevalence_editor():
         st.divider()
 
     # Filtrer les modules qui supportent la prévalence
-    supported_modules = [m for m in st.session_state.selected_modules if m not in MODULES_WITHOUT_PREVALENCE_SUPPORT]
+    supported_modules = [m for m in sorted(st.session_state.selected_modules) if m not in MODULES_WITHOUT_PREVALENCE_SUPPORT]
 
     if not supported_modules:
         st.info("Aucune pathologie sélectionnée ne supporte la modification de prévalence.")
@@ -530,8 +571,9 @@ def render_generate_button(
     with col3:
         st.metric("Âge", f"{age_min}-{age_max} ans")
 
-    if st.session_state.selected_modules:
-        st.caption(f"🏥 Pathologies: {', '.join([get_module_label(m) for m in st.session_state.selected_modules[:5]])}{'...' if len(st.session_state.selected_modules) > 5 else ''}")
+    selected_modules = sorted(st.session_state.selected_modules)
+    if selected_modules:
+        st.caption(f"🏥 Pathologies: {', '.join([get_module_label(m) for m in selected_modules[:5]])}{'...' if len(selected_modules) > 5 else ''}")
 
     # ==========================================================================
     # AUTO-DÉTECTION DU GENRE basée sur les pathologies sélectionnées
@@ -539,8 +581,8 @@ def render_generate_button(
     auto_gender = None
     gender_conflict = False
 
-    if st.session_state.selected_modules:
-        required_gender = get_optimal_gender_filter(st.session_state.selected_modules)
+    if selected_modules:
+        required_gender = get_optimal_gender_filter(selected_modules)
 
         if required_gender == "CONFLICT":
             gender_conflict = True
@@ -553,9 +595,9 @@ def render_generate_button(
             Veuillez désélectionner l'une des pathologies en conflit.
             """)
             # Identifier les pathologies en conflit
-            female_exclusive = [m for m in st.session_state.selected_modules
+            female_exclusive = [m for m in selected_modules
                                if m in GENDER_DISTRIBUTION and GENDER_DISTRIBUTION[m][0] == 1.0]
-            male_exclusive = [m for m in st.session_state.selected_modules
+            male_exclusive = [m for m in selected_modules
                              if m in GENDER_DISTRIBUTION and GENDER_DISTRIBUTION[m][1] == 1.0]
             if female_exclusive:
                 st.warning(f"👩 Pathologies 100% féminines: {', '.join([get_module_label(m) for m in female_exclusive])}")
@@ -565,7 +607,7 @@ def render_generate_button(
         elif required_gender == "F":
             auto_gender = "F"
             # Trouver les pathologies qui imposent le genre féminin
-            female_modules = [m for m in st.session_state.selected_modules
+            female_modules = [m for m in selected_modules
                              if m in GENDER_DISTRIBUTION and GENDER_DISTRIBUTION[m][0] == 1.0]
             modules_text = ', '.join([get_module_label(m) for m in female_modules])
             st.info(f"👩 **Genre automatiquement défini sur Femme** - Pathologie(s) exclusive(s): {modules_text}")
@@ -573,7 +615,7 @@ def render_generate_button(
         elif required_gender == "M":
             auto_gender = "M"
             # Trouver les pathologies qui imposent le genre masculin
-            male_modules = [m for m in st.session_state.selected_modules
+            male_modules = [m for m in selected_modules
                            if m in GENDER_DISTRIBUTION and GENDER_DISTRIBUTION[m][1] == 1.0]
             modules_text = ', '.join([get_module_label(m) for m in male_modules])
             st.info(f"👨 **Genre automatiquement défini sur Homme** - Pathologie(s) exclusive(s): {modules_text}")
@@ -614,7 +656,7 @@ def render_generate_button(
                     age_min=age_min,
                     age_max=age_max,
                     seed=seed,
-                    modules=st.session_state.selected_modules.copy(),
+                    modules=list(selected_modules),
                     custom_prevalence=st.session_state.custom_prevalence.copy(),
                     years_of_history=years_of_history,
                     reference_date=reference_date,
@@ -648,6 +690,7 @@ def render_generation_progress():
     st.caption("Veuillez patienter, la génération peut prendre plusieurs minutes...")
 
 
+@st.fragment
 def render_generation_results(result: GenerationResult):
     """Affichage des résultats de génération"""
 
@@ -678,7 +721,7 @@ def render_generation_results(result: GenerationResult):
                 # Vider le cache pour forcer le rechargement
                 st.cache_data.clear()
                 st.session_state.generation_result = None
-                st.rerun()
+                st.rerun(scope="app")
 
         with col2:
             if st.button("📋 Voir les logs"):
@@ -704,4 +747,4 @@ def render_generation_results(result: GenerationResult):
         # Bouton pour réessayer
         if st.button("🔄 Réessayer"):
             st.session_state.generation_result = None
-            st.rerun()
+            st.rerun(scope="app")